@@ -4,7 +4,6 @@ from datetime import date
 import sys
 import os
 import time
-import math
 from dotenv import load_dotenv
 
 # Carrega variáveis do arquivo .env (Ambiente Local)
@@ -76,17 +75,81 @@ if not check_password():
 
 # --- FIM AUTENTICAÇÃO ---
 
-# Conexão com Banco
+# Conexão com Banco (mesma instância compartilhada usada pelo scanner e serviços)
 @st.cache_resource
 def init_db():
     return get_supabase_client()
 
 supabase = init_db()
 
+# --- CAMADA DE DADOS (cache por TTL, invalidado pelas escritas do próprio dashboard) ---
+# Sinais têm TTL curto porque também são gravados pelo robô (fora do dashboard).
+# Carteira: agregados e opções de filtro vêm prontos do banco (update_schema_v5.sql);
+# a listagem é filtrada e paginada no servidor.
+RESULT_FILTERS = {"Todos": None, "Apenas Lucro 🟢": "profit", "Apenas Prejuízo 🔴": "loss"}
+
+@st.cache_data(ttl=300, show_spinner=False)
+def load_portfolio_options():
+    return supabase.rpc("portfolio_filter_options", {}).execute().data or {}
+
+@st.cache_data(ttl=300, show_spinner=False)
+def load_portfolio_summary(assets: tuple, statuses: tuple, result: str):
+    rows = supabase.rpc("portfolio_summary", {
+        "p_assets": list(assets) or None,
+        "p_statuses": list(statuses) or None,
+        "p_result": result
+    }).execute().data
+    return rows[0] if rows else {"trades": 0, "invested": 0, "returned": 0, "result": 0}
+
+@st.cache_data(ttl=300, show_spinner=False)
+def load_portfolio_page(assets: tuple, statuses: tuple, result: str, page_num: int, page_size: int):
+    query = supabase.table("portfolio").select("*")
+    if assets:
+        query = query.in_("ticker_asset", list(assets))
+    if statuses:
+        query = query.in_("status", list(statuses))
+    if result == "profit":
+        query = query.gt("result_percent", 0)
+    elif result == "loss":
+        query = query.lt("result_percent", 0)
+    start = (page_num - 1) * page_size
+    return query.order("created_at", desc=True).range(start, start + page_size - 1).execute().data
+
+@st.cache_data(ttl=300, show_spinner=False)
+def load_open_positions():
+    return supabase.table("portfolio").select("*").eq("status", "Aberta").order("created_at", desc=True).execute().data
+
+@st.cache_data(ttl=300, show_spinner=False)
+def load_portfolio_totals(view: str):
+    return supabase.table(view).select("*").execute().data
+
+PORTFOLIO_LOADERS = (
+    load_portfolio_options, load_portfolio_summary, load_portfolio_page, load_open_positions, load_portfolio_totals
+)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def load_signals(signal_date: str):
+    return supabase.table("signals")\
+        .select("*, option_opportunities(*) ")\
+        .eq("signal_date", signal_date)\
+        .execute().data
+
+@st.cache_data(ttl=300, show_spinner=False)
+def load_assets():
+    return supabase.table("assets").select("*").order("ticker").execute().data
+
+def invalidate_data(*loaders):
+    """Limpa o cache dos loaders informados (todos, se nenhum)."""
+    for loader in loaders or (*PORTFOLIO_LOADERS, load_signals, load_assets):
+        loader.clear()
+
 # --- SIDEBAR ---
 st.sidebar.title("🤖 Bot HiLo")
 page = st.sidebar.radio("Navegação", ["Carteira", "Sinais do Dia", "Consultar Opções", "Controle do Robô", "Configurações"])
 
+if st.sidebar.button("🔄 Atualizar Dados"):
+    invalidate_data()
+
 # --- PÁGINA: CARTEIRA (PORTFOLIO) ---
 if page == "Carteira":
     st.title("💰 Minha Carteira de Opções")
@@ -123,6 +186,7 @@ if page == "Carteira":
                 }
                 try:
                     supabase.table("portfolio").insert(data).execute()
+                    invalidate_data(*PORTFOLIO_LOADERS)
                     st.success("Operação registrada com sucesso!")
                     st.rerun()
                 except Exception as e:
@@ -132,99 +196,73 @@ if page == "Carteira":
     st.subheader("Custódia")
     
     try:
-        # Carrega dados
-        response = supabase.table("portfolio").select("*").order("created_at", desc=True).execute()
-        df = pd.DataFrame(response.data)
+        # Opções de filtro e totais agregados no banco (cache; recarrega só após escrita ou TTL)
+        options = load_portfolio_options()
         
-        if not df.empty:
-            # Filtrar operações abertas para uso posterior (Simulador e Encerramento)
-            abertas = df[df['status'] == 'Aberta']
+        if options.get('assets'):
+            # Operações abertas para uso posterior (Simulador e Encerramento)
+            abertas = pd.DataFrame(load_open_positions())
 
             # --- FILTROS ---
             with st.expander("🔍 Filtros", expanded=False):
                 col_f1, col_f2, col_f3 = st.columns(3)
                 
                 # Filtro Ativo
-                all_assets = df['ticker_asset'].unique().tolist()
-                sel_assets = col_f1.multiselect("Filtrar por Ativo", all_assets)
+                sel_assets = col_f1.multiselect("Filtrar por Ativo", options.get('assets', []))
                 
                 # Filtro Status
-                all_status = df['status'].unique().tolist()
-                sel_status = col_f2.multiselect("Filtrar por Status", all_status)
+                sel_status = col_f2.multiselect("Filtrar por Status", options.get('statuses', []))
                 
                 # Filtro Resultado
-                filter_profit = col_f3.radio("Filtrar Resultado", ["Todos", "Apenas Lucro 🟢", "Apenas Prejuízo 🔴"], horizontal=True)
+                filter_profit = col_f3.radio("Filtrar Resultado", list(RESULT_FILTERS), horizontal=True)
 
-            # Aplicar Filtros
-            df_filtered = df.copy()
+            # Filtros aplicados no servidor
+            filter_key = (tuple(sel_assets), tuple(sel_status), RESULT_FILTERS[filter_profit])
+            summary = load_portfolio_summary(*filter_key)
             
-            if sel_assets:
-                df_filtered = df_filtered[df_filtered['ticker_asset'].isin(sel_assets)]
+            # Rodapé (agregado no banco)
+            total_investido = float(summary['invested'] or 0)
+            total_retornado = float(summary['returned'] or 0)
+            total_resultado = float(summary['result'] or 0)
             
-            if sel_status:
-                df_filtered = df_filtered[df_filtered['status'].isin(sel_status)]
-                
-            if filter_profit == "Apenas Lucro 🟢":
-                df_filtered = df_filtered[df_filtered['result_percent'] > 0]
-            elif filter_profit == "Apenas Prejuízo 🔴":
-                df_filtered = df_filtered[df_filtered['result_percent'] < 0]
-
-            # --- PROCESSAMENTO PARA EXIBIÇÃO ---
-            display_data = []
+            # Paginação no servidor: só a página visível é baixada e formatada
+            PAGE_SIZE = 50
+            n_pages = max(1, -(-int(summary['trades'] or 0) // PAGE_SIZE))
+            page_num = 1
+            if n_pages > 1:
+                page_num = int(st.number_input(f"Página (de {n_pages})", min_value=1, max_value=n_pages, value=1, step=1))
             
-            # Acumuladores para o Rodapé
-            total_investido = 0.0
-            total_retornado = 0.0
-            total_resultado = 0.0
+            # --- PROCESSAMENTO PARA EXIBIÇÃO (operações por coluna) ---
+            pg = pd.DataFrame(
+                load_portfolio_page(*filter_key, page_num, PAGE_SIZE),
+                columns=['ticker_option', 'ticker_asset', 'type', 'quantity', 'entry_date', 'exit_date',
+                         'entry_price', 'exit_price', 'result_percent', 'status']
+            )
+            pg_entry_dt = pd.to_datetime(pg['entry_date'], errors='coerce')
+            pg_exit_dt = pd.to_datetime(pg['exit_date'], errors='coerce')
+            pg_entry = pd.to_numeric(pg['entry_price'], errors='coerce')
+            pg_exit = pd.to_numeric(pg['exit_price'], errors='coerce')
+            pg_pct = pd.to_numeric(pg['result_percent'], errors='coerce')
             
-            for index, row in df_filtered.iterrows():
-                # Datas
-                d_inicio = pd.to_datetime(row['entry_date']).date()
-                d_final = pd.to_datetime(row['exit_date']).date() if row['exit_date'] else None
-                
-                # Calculo Financeiro da Linha
-                investido_linha = (row['entry_price'] or 0) * (row['quantity'] or 0)
-                retornado_linha = (row['exit_price'] or 0) * (row['quantity'] or 0) # Se estiver aberta, exit_price é None/0
-                
-                res_val_db = row.get('result_value')
-                resultado_linha = float(res_val_db) if res_val_db is not None else 0.0
-                
-                total_investido += investido_linha
-                if row['status'] == 'Encerrada':
-                    total_retornado += retornado_linha
-                    total_resultado += resultado_linha
-                
-                # Dias
-                dias = (d_final - d_inicio).days if d_final else None
-                
-                # Resultado %
-                pct_res = row.get('result_percent')
-                if pct_res is not None:
-                     res_str = f"{pct_res:.2f}%"
-                else:
-                     res_str = "-"
-
-                # Sucesso (Sim/Não)
-                sucesso = ""
-                if row['status'] == 'Encerrada' and pct_res is not None:
-                    sucesso = "Sim" if pct_res > 0 else "Não"
-
-                display_data.append({
-                    "CÓDIGO": row['ticker_option'],
-                    "ATIVO": row['ticker_asset'],
-                    "ESTRUTURA": row['type'],
-                    "QUANTIDADE": row['quantity'],
-                    "DATA INICIO": d_inicio.strftime('%d/%m/%Y'),
-                    "DATA SAÍDA": d_final.strftime('%d/%m/%Y') if d_final else "-",
-                    "DIAS": dias if dias is not None else "-",
-                    "PREÇO SAÍDA": f"R$ {row['exit_price']:.2f}" if row['exit_price'] else "-",
-                    "PREÇO ENTRADA": f"R$ {row['entry_price']:.2f}",
-                    "RESULTADO": res_str,
-                    "SUCESSO": sucesso,
-                    "STATUS": row['status']
-                })
+            # Sucesso (Sim/Não) só para encerradas com resultado
+            sucesso = pd.Series("", index=pg.index)
+            has_result = (pg['status'] == 'Encerrada') & pg_pct.notna()
+            sucesso[has_result] = (pg_pct[has_result] > 0).map({True: "Sim", False: "Não"})
             
-            df_view = pd.DataFrame(display_data)
+            df_view = pd.DataFrame({
+                "CÓDIGO": pg['ticker_option'],
+                "ATIVO": pg['ticker_asset'],
+                "ESTRUTURA": pg['type'],
+                "QUANTIDADE": pg['quantity'],
+                "DATA INICIO": pg_entry_dt.dt.strftime('%d/%m/%Y'),
+                "DATA SAÍDA": pg_exit_dt.dt.strftime('%d/%m/%Y').fillna("-"),
+                "DIAS": (pg_exit_dt - pg_entry_dt).dt.days.astype('Int64').astype('string').fillna("-"),
+                "PREÇO SAÍDA": ("R$ " + pg_exit.map("{:.2f}".format)).where(pg_exit.fillna(0) != 0, "-"),
+                "PREÇO ENTRADA": "R$ " + pg_entry.map("{:.2f}".format),
+                "RESULTADO": pg_pct.map("{:.2f}%".format).where(pg_pct.notna(), "-"),
+                "SUCESSO": sucesso,
+                "STATUS": pg['status']
+            })
             
             # Função de Estilo
             def color_sucesso(val):
@@ -250,6 +288,24 @@ if page == "Carteira":
             else:
                 st.warning("Nenhum registro encontrado com os filtros selecionados.")
             
+            # --- RESULTADO POR ATIVO / MÊS (views agregadas no banco) ---
+            with st.expander("📊 Resultado por Ativo e por Mês", expanded=False):
+                col_g1, col_g2 = st.columns(2)
+                for col_g, view, key, label in (
+                    (col_g1, "portfolio_totals_by_asset", "ticker_asset", "Ativo"),
+                    (col_g2, "portfolio_totals_by_month", "month", "Mês")
+                ):
+                    df_group = pd.DataFrame(load_portfolio_totals(view))
+                    if df_group.empty:
+                        continue
+                    df_group = df_group.groupby(key, as_index=False)[['trades', 'invested', 'result']].sum()
+                    col_g.dataframe(
+                        df_group.rename(columns={
+                            key: label, "trades": "Operações", "invested": "Investido (R$)", "result": "Resultado (R$)"
+                        }),
+                        hide_index=True, use_container_width=True
+                    )
+            
             st.divider()
 
             # --- SIMULADOR DE CENÁRIOS ---
@@ -328,6 +384,7 @@ if page == "Carteira":
                                      "result_percent": pct_res,
                                      "status": "Encerrada"
                                  }).eq("id", close_data['id']).execute()
+                                 invalidate_data(*PORTFOLIO_LOADERS)
                                  
                                  st.success(f"Operação encerrada! Lucro/Preju: {pct_res:.2f}%")
                                  st.rerun()
@@ -345,13 +402,10 @@ elif page == "Sinais do Dia":
     st.title("📡 Sinais do Robô")
     selected_date = st.date_input("Data do Sinal", date.today(), format="DD/MM/YYYY")
     
-    response = supabase.table("signals")\
-        .select("*, option_opportunities(*) ")\
-        .eq("signal_date", str(selected_date))\
-        .execute()
+    signals_data = load_signals(str(selected_date))
     
-    if response.data:
-        for s in response.data:
+    if signals_data:
+        for s in signals_data:
             # Lógica para descrição mais clara da tendência
             raw_signal = s.get('signal', '')
             if "ALTA" in raw_signal:
@@ -408,7 +462,7 @@ elif page == "Sinais do Dia":
                             
                             # Passamos 'direction_label' como signal
                             svc.send_signal_message(s['ticker'], direction_label, opt_data_resend)
-                            st.toast("Mensagem reenviada!")
+                            st.toast("Mensagem enfileirada para reenvio!")
 
                     with col_del:
                         if st.button("🗑️ Excluir Sinal", key=f"del_{s['id']}"):
@@ -417,6 +471,7 @@ elif page == "Sinais do Dia":
                                 supabase.table("option_opportunities").delete().eq("signal_id", s['id']).execute()
                                 # 2. Remover o Sinal
                                 supabase.table("signals").delete().eq("id", s['id']).execute()
+                                invalidate_data(load_signals)
                                 
                                 st.success("Sinal removido!")
                                 time.sleep(0.5)
@@ -496,28 +551,10 @@ elif page == "Consultar Opções":
                                 # --- LADO ESQUERDO: REGRA MANUAL (Consultor) ---
                                 with col_manual:
                                     st.markdown("### 🛠️ Regra Manual")
-                                    st.caption("Filtro: Vencimento Mensal | **Delta Estimado 0.40-0.50** (Black-Scholes Vol. 32%) | Liquidez")
+                                    st.caption("Filtro: Vencimento Mensal | **Delta Estimado 0.40-0.50** (Black-Scholes c/ Vol. Implícita) | Liquidez")
                                     
                                     # --- CALCULADORA BLACK-SCHOLES INTERNA ---
-                                    # Como a API bloqueia as gregas (VolBlur), calculamos internamente.
-                                    def calculate_bs_delta(S, K, days, r=0.1125, sigma=0.32, type_='CALL'):
-                                        """
-                                        Estima Delta usando Black-Scholes.
-                                        S: Preço Ativo, K: Strike, days: Dias úteis (DTE), r: Taxa Livre Risco (11.25%), sigma: Volatilidade (32%)
-                                        """
-                                        if days <= 0 or S <= 0 or K <= 0: return 0.0
-                                        T = days / 365.0
-                                        try:
-                                            d1 = (math.log(S/K) + (r + 0.5*sigma**2)*T) / (sigma*math.sqrt(T))
-                                            # Aproximação da CDF Normal usando math.erf
-                                            cdf_d1 = 0.5 * (1 + math.erf(d1 / math.sqrt(2)))
-                                            
-                                            if type_ == 'CALL':
-                                                return cdf_d1
-                                            else:
-                                                return cdf_d1 - 1
-                                        except Exception:
-                                            return 0.0
+                                    # Como a API bloqueia as gregas (VolBlur), calculamos internamente (vetorizado).
 
                                     # Filtra dados para Manual
                                     df_type = df_valid[df_valid['type'] == opt_type].copy()
@@ -526,15 +563,8 @@ elif page == "Consultar Opções":
                                         st.warning("Sem opções disponíveis.")
                                     else:
                                         # Calcular Delta Estimado para todas as candidatas
-                                        # Assumimos Volatilidade Fixa de 32% (Média razoável para BRKM/SUZB/VALE)
-                                        df_type['delta_bs'] = df_type.apply(
-                                            lambda row: calculate_bs_delta(
-                                                S=price, 
-                                                K=row['strike'], 
-                                                days=row['dte'], 
-                                                type_=row['type']
-                                            ), axis=1
-                                        )
+                                        # Vol Implícita de cada strike (sem negócios/preço: Vol Fixa de 32%)
+                                        df_type['iv'], df_type['delta_bs'] = OptionsSelector.estimate_iv_delta(df_type, price)
                                         
                                         # LÓGICA ROBUSTA: Range Delta 0.40 - 0.53
                                         if opt_type == "CALL":
@@ -578,7 +608,9 @@ elif page == "Consultar Opções":
                                                 st.write(f"Último: R$ {best_manual.get('lastPrice', 0):.2f}")
                                                 
                                                 d_val = best_manual['delta_bs']
-                                                st.caption(f"✅ **Delta Estimado: {d_val:.3f}** (Vol Fixa 32%)")
+                                                iv_val = best_manual['iv']
+                                                vol_txt = f"Vol Implícita {iv_val*100:.1f}%" if pd.notna(iv_val) else "Vol Fixa 32%"
+                                                st.caption(f"✅ **Delta Estimado: {d_val:.3f}** ({vol_txt})")
 
 
                                 # --- LADO DIREITO: REGRA PRODUÇÃO (Robô) ---
@@ -660,24 +692,56 @@ elif page == "Controle do Robô":
     st.subheader("Execução Manual")
     col_exec1, col_exec2 = st.columns(2)
     
+    # Varredura completa roda em segundo plano (um job por vez, compartilhado entre usuários)
+    from src.services.scan_jobs import get_job_registry, capture_stdout
+    registry = get_job_registry()
+    
+    # st.fragment (run_every) atualiza só este bloco, e só enquanto o job roda
+    fragment = getattr(st, "fragment", None) or st.experimental_fragment
+
+    def show_scan_job(job):
+        if job.is_active:
+            progress = job.done / job.total if job.total else 0.0
+            label = f"{job.done}/{job.total} ativos" if job.total else "Preparando..."
+            if job.current:
+                label += f" | último: {job.current}"
+            st.progress(progress, text=f"⏳ Análise em andamento ({job.elapsed():.0f}s) — {label}")
+        elif job.status == "done":
+            st.success(f"Análise concluída em {job.elapsed():.0f}s!")
+        else:
+            st.error(f"Erro na execução: {job.error}")
+        
+        # Sinais novos: limpa o cache uma vez por job concluído
+        if not job.is_active and st.session_state.get("scan_job_seen") != job.id:
+            st.session_state["scan_job_seen"] = job.id
+            invalidate_data(load_signals)
+        
+        with st.expander("Ver Logs da Execução", expanded=job.is_active):
+            st.code(job.log_text(tail=400) or "...")
+
+    @fragment(run_every=1.0)
+    def follow_scan_job():
+        job = registry.latest("market_scan")
+        if job is None or not job.is_active:
+            # Job terminou: recarrega a página uma vez (resultado estático, sem polling)
+            st.rerun()
+        show_scan_job(job)
+
     with col_exec1:
-        if st.button("🚀 Rodar Análise Completa Agora", type="primary"):
-            with st.spinner("Executando scanner de mercado..."):
-                try:
-                    # Captura logs
-                    import io
-                    from contextlib import redirect_stdout
-                    f = io.StringIO()
-                    with redirect_stdout(f):
-                         run_market_scan(is_manual_run=True)
-                    output = f.getvalue()
-                    
-                    st.success("Análise concluída!")
-                    with st.expander("Ver Logs da Execução"):
-                        st.code(output)
-                        
-                except Exception as e:
-                    st.error(f"Erro na execução: {e}")
+        running_job = registry.active("market_scan")
+        if st.button("🚀 Rodar Análise Completa Agora", type="primary", disabled=running_job is not None):
+            job, created = registry.submit(
+                "market_scan",
+                lambda job: run_market_scan(is_manual_run=True, on_progress=job.set_progress)
+            )
+            if not created:
+                st.info("Já existe uma análise em andamento — acompanhando a execução atual.")
+        
+        last_job = registry.latest("market_scan")
+        if last_job is not None and last_job.is_active:
+            follow_scan_job()
+        elif last_job is not None:
+            show_scan_job(last_job)
 
     with col_exec2:
          # Input para testar ticker específico
@@ -686,10 +750,8 @@ elif page == "Controle do Robô":
              if ticker_test:
                  with st.spinner(f"Analisando {ticker_test}..."):
                     try:
-                        import io
-                        from contextlib import redirect_stdout
-                        f = io.StringIO()
-                        with redirect_stdout(f):
+                        # Captura só o log desta análise (não interfere no job em segundo plano)
+                        with capture_stdout() as f:
                              # Pequena gambiarra para rodar só um ticker: 
                              # Instancia o scanner e roda analyze_asset direto
                              from src.core.scanner import MarketScanner
@@ -697,6 +759,7 @@ elif page == "Controle do Robô":
                              scanner.analyze_asset(ticker_test.upper(), force_notification=True)
                         
                         output = f.getvalue()
+                        invalidate_data(load_signals)
                         st.success(f"Análise de {ticker_test} finalizada!")
                         with st.expander("Logs"):
                             st.code(output)
@@ -707,12 +770,32 @@ elif page == "Controle do Robô":
                         else:
                             st.error(f"❌ Não foi possível analisar o ativo. Erro técnico: {err_msg}")
 
+    # Fila de Notificações (Outbox)
+    from src.services.notification_service import NotificationService
+    outbox = NotificationService().outbox
+    if outbox is not None:
+        with st.expander("📬 Fila de Notificações (WhatsApp)"):
+            summary = outbox.summary()
+            col_q1, col_q2, col_q3 = st.columns(3)
+            col_q1.metric("Enviadas", summary.get("sent", 0))
+            col_q2.metric("Pendentes", summary.get("pending", 0) + summary.get("sending", 0))
+            col_q3.metric("Falharam", summary.get("failed", 0))
+            
+            recent = outbox.recent(limit=20)
+            if recent:
+                df_outbox = pd.DataFrame(recent)
+                for col in ("created_at", "sent_at"):
+                    df_outbox[col] = pd.to_datetime(df_outbox[col], unit="s").dt.strftime("%d/%m %H:%M:%S")
+                st.dataframe(
+                    df_outbox[["id", "status", "attempts", "created_at", "sent_at", "last_error", "preview"]],
+                    hide_index=True, use_container_width=True
+                )
+
     st.divider()
 
     # Gestão de Ativos Monitorados
     st.subheader("📋 Ativos Monitorados")
-    assets_response = supabase.table("assets").select("*").order("ticker").execute()
-    assets_df = pd.DataFrame(assets_response.data)
+    assets_df = pd.DataFrame(load_assets())
     
     if not assets_df.empty:
         # Formatar data
@@ -753,6 +836,7 @@ elif page == "Controle do Robô":
                         
                         # 4. Remover Ativo (Pai)
                         supabase.table("assets").delete().eq("ticker", asset_to_remove).execute()
+                        invalidate_data(load_assets, load_signals)
                         
                         st.success(f"{asset_to_remove} removido completamente (sinais e histórico limpos).")
                         time.sleep(1.5)
@@ -779,6 +863,7 @@ elif page == "Controle do Robô":
                         }
                         
                         supabase.table("assets").insert(payload).execute()
+                        invalidate_data(load_assets)
                         st.success(f"{new_ticker} adicionado com sucesso!")
                         time.sleep(1)
                         st.rerun()
@@ -802,6 +887,10 @@ elif page == "Configurações":
     if os.path.exists(CONFIG_FILE):
         with open(CONFIG_FILE, "r") as f:
             current_conf = json.load(f)
+    
+    # Número do WhatsApp vem do app_config (mesma fonte usada pelo robô)
+    from src.services.app_config import get_app_config
+    app_config = get_app_config()
             
     with st.form("settings_form"):
         st.subheader("Parâmetros do Robô")
@@ -811,7 +900,10 @@ elif page == "Configurações":
         
         st.write("Alertas e Notificações")
         profit_t = st.number_input("Meta de Lucro para Aviso (%)", value=float(current_conf.get("profit_target", 50.0)), step=5.0)
-        phone_n = st.text_input("Número WhatsApp (com DDD)", value=current_conf.get("whatsapp_number", "55..."))
+        phone_n = st.text_input(
+            "Número WhatsApp (com DDD)",
+            value=app_config.get("whatsapp_number", current_conf.get("whatsapp_number", "55..."))
+        )
         
         if st.form_submit_button("💾 Salvar Configurações"):
             new_conf = current_conf.copy()
@@ -822,6 +914,48 @@ elif page == "Configurações":
             with open(CONFIG_FILE, "w") as f:
                 json.dump(new_conf, f)
             
+            # Grava no banco (e no cache) para o robô usar o número novo sem reconsultar
+            if phone_n and phone_n != app_config.get("whatsapp_number"):
+                if not app_config.set("whatsapp_number", phone_n):
+                    st.warning("Não foi possível salvar o número do WhatsApp no banco.")
+            
             st.success("Configurações salvas com sucesso!")
-            # Opcional: Salvar no banco também se quiser backup na nuvem
-            # supabase.table("app_config").upsert(...)
+
+    st.divider()
+
+    # Simulação de Períodos (HiLo Sweep)
+    st.subheader("🔬 Comparar Períodos do HiLo")
+    st.caption("Mostra como cada período (3 a 60) teria se comportado no último ano do ativo.")
+
+    col_sw1, col_sw2 = st.columns([1, 3])
+    sweep_ticker = col_sw1.text_input("Ativo para Simulação", value="PETR4").upper().strip()
+
+    if col_sw1.button("📊 Simular Períodos"):
+        with st.spinner(f"Calculando HiLo 3..60 para {sweep_ticker}..."):
+            try:
+                from src.services.brapi import BrapiClient
+                from src.core.indicators import Indicators
+
+                raw_hist = BrapiClient().get_historical_data(sweep_ticker, range='1y', interval='1d', include_today=False)
+
+                if not raw_hist:
+                    st.warning(f"Sem histórico para {sweep_ticker}.")
+                else:
+                    df_hist = pd.DataFrame(raw_hist)
+                    df_hist['date'] = pd.to_datetime(df_hist['date'], unit='s')
+
+                    # Matriz período x data com a tendência (1 / -1 / 0)
+                    sweep = Indicators.hilo_sweep(df_hist, periods=range(3, 61))
+
+                    prev = sweep.shift(1, axis=1).fillna(0)
+                    flips = (sweep != prev) & (prev != 0) & (sweep != 0)
+
+                    resumo = pd.DataFrame({
+                        "Viradas no Período": flips.sum(axis=1),
+                        "Tendência Atual": sweep.iloc[:, -1].map({1: "ALTA 🟢", -1: "BAIXA 🔴", 0: "-"})
+                    })
+                    resumo.index.name = "Período"
+
+                    col_sw2.dataframe(resumo, use_container_width=True)
+            except Exception as e:
+                st.error(f"Erro na simulação: {e}")
@@ -9,15 +9,59 @@ class Config:
     SUPABASE_URL = os.getenv("SUPABASE_URL")
     SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
+    # Transporte HTTP (Brapi / Opcoes.net): timeouts em segundos e retries com backoff
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+    HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "20"))
+    HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+    HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.5"))
+    HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+
+    # Cotações: validade do cache em memória (s) e símbolos por requisição na Brapi
+    QUOTE_CACHE_TTL = float(os.getenv("QUOTE_CACHE_TTL", "30"))
+    BRAPI_BATCH_SIZE = int(os.getenv("BRAPI_BATCH_SIZE", "10"))
+
+    # Número máximo de ativos analisados em paralelo pelo scanner
+    SCAN_CONCURRENCY = int(os.getenv("SCAN_CONCURRENCY", "8"))
+
+    # Sinais enfileirados antes de forçar uma gravação em lote (modo write-behind do scan)
+    REPOSITORY_FLUSH_SIZE = int(os.getenv("REPOSITORY_FLUSH_SIZE", "50"))
+
+    # Cache local de candles (SQLite). Vazio desativa o cache.
+    CANDLE_STORE_PATH = os.getenv(
+        "CANDLE_STORE_PATH",
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "candles.db")
+    )
+
+    # Fila durável de notificações (tabela notification_outbox do banco configurado). "false" desativa (envio síncrono)
+    NOTIFY_OUTBOX = os.getenv("NOTIFY_OUTBOX", "true").strip().lower() not in ("0", "false", "no", "")
+    NOTIFY_MAX_ATTEMPTS = int(os.getenv("NOTIFY_MAX_ATTEMPTS", "5"))
+    NOTIFY_RETRY_BACKOFF = float(os.getenv("NOTIFY_RETRY_BACKOFF", "2"))     # s (dobra a cada tentativa)
+    NOTIFY_MIN_INTERVAL = float(os.getenv("NOTIFY_MIN_INTERVAL", "1"))       # s entre mensagens
+    NOTIFY_DRAIN_TIMEOUT = float(os.getenv("NOTIFY_DRAIN_TIMEOUT", "60"))    # espera máxima no fim do scan
+    WHATSAPP_MAX_CHARS = int(os.getenv("WHATSAPP_MAX_CHARS", "4000"))         # tamanho máximo de cada mensagem do digest
+
+    # Validade (s) do cache da tabela app_config (ex: número do WhatsApp)
+    APP_CONFIG_TTL = float(os.getenv("APP_CONFIG_TTL", "300"))
+
+    # Backend de persistência: "supabase" (padrão) ou "sqlite" (local, sem rede)
+    STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "supabase").strip().lower()
+    SQLITE_DB_PATH = os.getenv(
+        "SQLITE_DB_PATH",
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "trading_bot.db")
+    )
+
     @classmethod
     def validate(cls):
         missing = []
         if not cls.BRAPI_TOKEN:
             missing.append("BRAPI_TOKEN")
-        if not cls.SUPABASE_URL:
-            missing.append("SUPABASE_URL")
-        if not cls.SUPABASE_KEY:
-            missing.append("SUPABASE_KEY")
+        if cls.STORAGE_BACKEND not in ("supabase", "sqlite"):
+            raise ValueError(f"STORAGE_BACKEND inválido: {cls.STORAGE_BACKEND}")
+        if cls.STORAGE_BACKEND == "supabase":
+            if not cls.SUPABASE_URL:
+                missing.append("SUPABASE_URL")
+            if not cls.SUPABASE_KEY:
+                missing.append("SUPABASE_KEY")
         
         if missing:
             raise ValueError(f"Faltam variáveis de ambiente configuradas: {', '.join(missing)}")
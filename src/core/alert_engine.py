@@ -0,0 +1,181 @@
+import itertools
+from bisect import bisect_left, bisect_right
+
+# Lado do cruzamento -> regra sobre o novo preço
+#   above:       preço >  nível  (ex: virada para Alta)
+#   at_or_above: preço >= nível  (ex: meta de lucro)
+#   at_or_below: preço <= nível  (ex: virada para Baixa)
+#   below:       preço <  nível
+SIDES = ("above", "at_or_above", "at_or_below", "below")
+
+
+class AlertEngine:
+    """
+    Índice de alertas de preço ("preço cruza o nível X") por ticker (ativo base
+    ou opção), com os níveis de cada lado em listas ordenadas.
+
+    `evaluate` recebe um lote de cotações e, para cada ticker, localiza por
+    busca binária só os níveis entre o preço anterior e o novo:
+    O(log n + k) por cotação, sem varrer todos os alertas a cada rodada.
+    Na primeira cotação de um ticker (sem preço anterior, ver `seed`) vale o
+    estado atual: dispara todo alerta cuja condição já é verdadeira.
+    """
+
+    def __init__(self):
+        self._levels = {}     # {ticker: {side: [nível, ...]}} (ordenado)
+        self._alerts = {}     # {ticker: {side: [alerta, ...]}} (mesma ordem de _levels)
+        self._by_id = {}      # {id: alerta}
+        self._last = {}       # {ticker: último preço avaliado}
+        self._ids = itertools.count(1)
+
+    def __len__(self):
+        return len(self._by_id)
+
+    # --- Cadastro ---
+
+    def add(self, ticker: str, level: float, side: str, kind: str, band: tuple = None, **data) -> int:
+        """
+        Registra um alerta e retorna o id.
+        :param kind: tipo livre ('flip', 'proximity', 'profit_target', ...)
+        :param band: (mínimo, máximo) opcional; só dispara se o novo preço ficar dentro da faixa aberta
+        :param data: dados extras devolvidos junto com o alerta disparado
+        """
+        if side not in SIDES:
+            raise ValueError(f"Lado inválido: {side} (use {', '.join(SIDES)})")
+
+        level = float(level)
+        alert = {"id": next(self._ids), "ticker": ticker, "level": level, "side": side,
+                 "kind": kind, "band": band, **data}
+
+        levels = self._levels.setdefault(ticker, {}).setdefault(side, [])
+        alerts = self._alerts.setdefault(ticker, {}).setdefault(side, [])
+        pos = bisect_right(levels, level)
+        levels.insert(pos, level)
+        alerts.insert(pos, alert)
+        self._by_id[alert["id"]] = alert
+        return alert["id"]
+
+    def add_flip(self, trigger: dict) -> list:
+        """
+        Alertas de um gatilho de virada (linha de 'flip_triggers'):
+        virada (mesma regra de analyze_asset) e entrada na faixa de proximidade.
+        """
+        ticker = trigger["ticker"]
+        level = float(trigger["trigger_price"])
+        direction = trigger["direction"]
+        low, high = float(trigger["band_low"]), float(trigger["band_high"])
+
+        side = "above" if direction == "BUY" else "at_or_below"
+        return [
+            self.add(ticker, level, side, "flip", direction=direction, trigger_price=level),
+            *self.add_proximity(ticker, low, high, trigger_price=level),
+        ]
+
+    def add_proximity(self, ticker: str, low: float, high: float, **data) -> list:
+        """Entrada na faixa aberta (low, high): por baixo (cruza o piso) ou por cima (cruza o teto)."""
+        low, high = float(low), float(high)
+        return [
+            self.add(ticker, low, "above", "proximity", band=(low, high), **data),
+            self.add(ticker, high, "below", "proximity", band=(low, high), **data),
+        ]
+
+    def add_profit_target(self, position: dict, profit_target: float, ticker_asset: str = None) -> int:
+        """Meta de lucro de uma opção em carteira: preço >= entrada * (1 + meta%)."""
+        entry_price = float(position["entry_price"])
+        return self.add(
+            position["ticker_option"], entry_price * (1 + profit_target / 100), "at_or_above", "profit_target",
+            ticker_asset=ticker_asset or position.get("ticker_asset"), entry_price=entry_price,
+            profit_target=profit_target
+        )
+
+    def remove(self, alert_id: int) -> bool:
+        alert = self._by_id.pop(alert_id, None)
+        if alert is None:
+            return False
+
+        levels = self._levels[alert["ticker"]][alert["side"]]
+        alerts = self._alerts[alert["ticker"]][alert["side"]]
+        pos = bisect_left(levels, alert["level"])
+        while alerts[pos]["id"] != alert_id:
+            pos += 1
+        del levels[pos]
+        del alerts[pos]
+        return True
+
+    def clear(self, ticker: str = None):
+        """Remove todos os alertas (ou só os de um ticker). Os últimos preços são mantidos."""
+        tickers = [ticker] if ticker else list(self._alerts)
+        for tk in tickers:
+            for alerts in self._alerts.pop(tk, {}).values():
+                for alert in alerts:
+                    self._by_id.pop(alert["id"], None)
+            self._levels.pop(tk, None)
+
+    def seed(self, prices: dict):
+        """
+        Define o preço anterior dos tickers ainda não avaliados neste processo
+        (ex: último preço salvo pela execução anterior do dia).
+        """
+        for ticker, price in prices.items():
+            if price and ticker not in self._last:
+                self._last[ticker] = float(price)
+
+    def last_prices(self, tickers: list = None) -> dict:
+        """Último preço avaliado de cada ticker (para persistir entre execuções)."""
+        if tickers is None:
+            return dict(self._last)
+        return {tk: self._last[tk] for tk in tickers if tk in self._last}
+
+    @property
+    def tickers(self) -> list:
+        """Tickers com pelo menos um alerta ativo (para a cotação em lote)."""
+        return [tk for tk, sides in self._levels.items() if any(sides.values())]
+
+    # --- Avaliação ---
+
+    def evaluate(self, quotes: dict) -> list:
+        """
+        Avalia um lote de cotações ({ticker: preço}) e retorna só os alertas
+        cruzados desde a cotação anterior de cada ticker.
+        Cada item é o alerta com 'price' (novo) e 'previous' (anterior ou None).
+        """
+        fired = []
+        for ticker, price in quotes.items():
+            if not price:
+                continue
+            price = float(price)
+            previous = self._last.get(ticker)
+            self._last[ticker] = price
+
+            sides = self._levels.get(ticker)
+            if not sides:
+                continue
+            bands_hit = set()
+            for side, levels in sides.items():
+                lo, hi = self._crossed_range(levels, side, previous, price)
+                for alert in self._alerts[ticker][side][lo:hi]:
+                    band = alert["band"]
+                    if band:
+                        # Faixa = dois níveis (piso e teto): sem preço anterior os dois disparam,
+                        # mas a entrada na faixa conta uma vez só
+                        if not (band[0] < price < band[1]) or (alert["kind"], band) in bands_hit:
+                            continue
+                        bands_hit.add((alert["kind"], band))
+                    fired.append({**alert, "price": price, "previous": previous})
+        return fired
+
+    @staticmethod
+    def _crossed_range(levels: list, side: str, previous, price: float) -> tuple:
+        """Fatia [lo, hi) de `levels` cruzada ao ir de `previous` para `price`."""
+        if side == "above":          # previous <= nível < price
+            lo = 0 if previous is None else bisect_left(levels, previous)
+            return lo, bisect_left(levels, price)
+        if side == "at_or_above":    # previous < nível <= price
+            lo = 0 if previous is None else bisect_right(levels, previous)
+            return lo, bisect_right(levels, price)
+        if side == "at_or_below":    # price <= nível < previous
+            hi = len(levels) if previous is None else bisect_left(levels, previous)
+            return bisect_left(levels, price), hi
+        # below: price < nível <= previous
+        hi = len(levels) if previous is None else bisect_right(levels, previous)
+        return bisect_right(levels, price), hi
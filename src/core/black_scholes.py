@@ -0,0 +1,138 @@
+import numpy as np
+from scipy.special import ndtr
+
+class BlackScholes:
+    """
+    Black-Scholes vetorizado (NumPy/SciPy) para a cadeia de opções inteira.
+    Todas as funções aceitam escalares ou arrays (com broadcasting).
+    Prazo em dias corridos (T = days / 365).
+    """
+
+    RISK_FREE = 0.1125   # Taxa Livre de Risco (11.25%)
+    DEFAULT_VOL = 0.32   # Volatilidade padrão (32%), usada quando não há IV
+    VOL_BOUNDS = (1e-4, 5.0)
+
+    @staticmethod
+    def delta(S, K, days, r=RISK_FREE, sigma=DEFAULT_VOL, is_call=True):
+        """
+        Delta de cada opção. S: Preço Ativo, K: Strike, days: DTE (dias corridos),
+        is_call: bool ou array de bool (False = PUT).
+        Linhas com days <= 0, S <= 0 ou K <= 0 retornam 0.0 (máscara, sem exceção).
+        """
+        S, K, days, sigma, is_call = BlackScholes._broadcast(S, K, days, sigma, is_call)
+        invalid = (days <= 0) | (S <= 0) | (K <= 0)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            T = days / 365.0
+            d1 = (np.log(S / K) + (r + 0.5 * sigma**2) * T) / (sigma * np.sqrt(T))
+            cdf_d1 = ndtr(d1)
+
+        out = np.where(is_call, cdf_d1, cdf_d1 - 1)
+        return np.where(invalid, 0.0, out)
+
+    @staticmethod
+    def price(S, K, days, r=RISK_FREE, sigma=DEFAULT_VOL, is_call=True):
+        """Prêmio teórico (CALL/PUT). Linhas inválidas retornam NaN."""
+        S, K, days, sigma, is_call = BlackScholes._broadcast(S, K, days, sigma, is_call)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return BlackScholes._price(S, K, days / 365.0, r, sigma, is_call)
+
+    @staticmethod
+    def greeks(S, K, days, r=RISK_FREE, sigma=DEFAULT_VOL, is_call=True):
+        """
+        Gregas por opção (sigma pode ser a IV de cada strike).
+        Retorna dict de arrays: delta, gamma, vega (por 1 p.p. de vol) e theta (por dia).
+        Linhas inválidas retornam 0.0.
+        """
+        S, K, days, sigma, is_call = BlackScholes._broadcast(S, K, days, sigma, is_call)
+        invalid = (days <= 0) | (S <= 0) | (K <= 0) | ~(sigma > 0)
+
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            T = days / 365.0
+            sqrt_t = np.sqrt(T)
+            d1, d2 = BlackScholes._d1_d2(S, K, T, r, sigma)
+            pdf_d1 = np.exp(-0.5 * d1**2) / np.sqrt(2 * np.pi)
+            disc = K * np.exp(-r * T)
+
+            delta = np.where(is_call, ndtr(d1), ndtr(d1) - 1)
+            gamma = pdf_d1 / (S * sigma * sqrt_t)
+            vega = S * pdf_d1 * sqrt_t / 100.0
+            decay = -S * pdf_d1 * sigma / (2 * sqrt_t)
+            theta = np.where(is_call, decay - r * disc * ndtr(d2), decay + r * disc * ndtr(-d2)) / 365.0
+
+        return {
+            name: np.where(invalid, 0.0, values)
+            for name, values in (('delta', delta), ('gamma', gamma), ('vega', vega), ('theta', theta))
+        }
+
+    @staticmethod
+    def implied_vol(premium, S, K, days, r=RISK_FREE, is_call=True, tol=1e-8, max_iter=50, min_premium=0.01):
+        """
+        Volatilidade implícita de todas as opções de uma vez.
+
+        Newton-Raphson vetorizado com fallback para bisseção: cada linha mantém
+        um intervalo [lo, hi] que contém a solução; quando o passo de Newton sai
+        do intervalo (ou a vega é ~0) usa-se o ponto médio.
+
+        Linhas sem solução (prêmio abaixo de `min_premium`, fora dos limites de
+        não-arbitragem, days <= 0, S <= 0 ou K <= 0) retornam NaN.
+        """
+        premium, S, K, days, is_call = BlackScholes._broadcast(premium, S, K, days, is_call)
+
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            T = days / 365.0
+            disc = K * np.exp(-r * T)
+            lower = np.where(is_call, np.maximum(S - disc, 0.0), np.maximum(disc - S, 0.0))
+            upper = np.where(is_call, S, disc)
+            valid = (
+                np.isfinite(premium) & (premium >= min_premium) & (S > 0) & (K > 0) & (days > 0)
+                & (premium > lower) & (premium < upper)
+            )
+
+            lo = np.full(premium.shape, BlackScholes.VOL_BOUNDS[0])
+            hi = np.full(premium.shape, BlackScholes.VOL_BOUNDS[1])
+            # Chute inicial (Brenner-Subrahmanyam), limitado ao intervalo
+            sigma = np.clip(np.sqrt(2 * np.pi / T) * premium / S, 0.05, 2.0)
+            sigma = np.where(valid, sigma, BlackScholes.DEFAULT_VOL)
+
+            active = valid.copy()
+            for _ in range(max_iter):
+                if not active.any():
+                    break
+
+                diff = BlackScholes._price(S, K, T, r, sigma, is_call) - premium
+                active &= ~(np.abs(diff) < tol)
+
+                # O prêmio cresce com a vol: ajusta o intervalo pelo sinal do erro
+                hi = np.where(active & (diff > 0), sigma, hi)
+                lo = np.where(active & (diff < 0), sigma, lo)
+
+                d1, _ = BlackScholes._d1_d2(S, K, T, r, sigma)
+                vega = S * np.exp(-0.5 * d1**2) / np.sqrt(2 * np.pi) * np.sqrt(T)
+                newton = sigma - diff / vega
+
+                bisect = ~np.isfinite(newton) | (newton <= lo) | (newton >= hi)
+                sigma = np.where(active, np.where(bisect, 0.5 * (lo + hi), newton), sigma)
+
+        return np.where(valid, sigma, np.nan)
+
+    @staticmethod
+    def _d1_d2(S, K, T, r, sigma):
+        d1 = (np.log(S / K) + (r + 0.5 * sigma**2) * T) / (sigma * np.sqrt(T))
+        return d1, d1 - sigma * np.sqrt(T)
+
+    @staticmethod
+    def _price(S, K, T, r, sigma, is_call):
+        d1, d2 = BlackScholes._d1_d2(S, K, T, r, sigma)
+        disc = K * np.exp(-r * T)
+        call = S * ndtr(d1) - disc * ndtr(d2)
+        put = disc * ndtr(-d2) - S * ndtr(-d1)
+        return np.where(is_call, call, put)
+
+    @staticmethod
+    def _broadcast(*arrays):
+        *values, is_call = arrays
+        return np.broadcast_arrays(
+            *(np.asarray(v, dtype=np.float64) for v in values),
+            np.asarray(is_call, dtype=bool)
+        )
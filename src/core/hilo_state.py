@@ -0,0 +1,285 @@
+from collections import deque
+import numbers
+import numpy as np
+import pandas as pd
+from src.core.indicators import Indicators, candle_day
+
+class HiLoState:
+    """
+    Estado incremental do HiLo de um ativo.
+
+    Guarda a janela das últimas N máximas/mínimas com as somas móveis,
+    a tendência e o último HiLo. Cada candle novo custa O(1): soma o valor
+    que entra, subtrai o que sai e aplica a mesma máquina de estados de
+    `Indicators.calculate_hilo` (a tendência só é definida a partir do
+    candle de índice `period`, começando em Baixa).
+
+    O último candle pode ser revisado: se chegar outro candle do mesmo dia
+    (ex: barra do pregão que ainda estava em formação), o passo anterior é
+    desfeito e reaplicado com os valores novos.
+    """
+
+    def __init__(self, ticker: str, period: int = 10):
+        self.ticker = ticker
+        self.period = int(period)
+        self.highs = deque(maxlen=self.period)
+        self.lows = deque(maxlen=self.period)
+        self.sum_high = 0.0
+        self.sum_low = 0.0
+        self.count = 0          # Total de candles já processados
+        self.trend = 0          # 0 = indefinido, 1 = alta, -1 = baixa
+        self.hilo = None
+        self.last_close = None
+        self.last_date = None   # Timestamp (unix) do último candle processado
+        # Dados para desfazer o último passo: (trend, hilo, high/low que saíram da janela)
+        self.prev_trend = 0
+        self.prev_hilo = None
+        self.dropped = None
+
+    # --- Leitura ---
+
+    @property
+    def is_ready(self) -> bool:
+        """True quando já existe tendência definida."""
+        return self.trend != 0 and self.hilo is not None
+
+    @property
+    def sma_high(self):
+        return self.sum_high / self.period if len(self.highs) == self.period else None
+
+    @property
+    def sma_low(self):
+        return self.sum_low / self.period if len(self.lows) == self.period else None
+
+    @property
+    def last_day(self):
+        """Data (calendário) do último candle processado."""
+        return candle_day(self.last_date) if self.last_date is not None else None
+
+    # --- Atualização ---
+
+    def update(self, candle: dict) -> bool:
+        """
+        Avança o estado com um candle ({'date', 'high', 'low', 'close'}).
+        Candles anteriores ao último processado são ignorados; um candle do
+        mesmo dia substitui o último. Retorna True se o estado mudou.
+        """
+        ts = candle.get('date')
+        high = float(candle['high'])
+        low = float(candle['low'])
+        close = float(candle['close'])
+
+        if self.last_date is not None and ts is not None:
+            day = candle_day(ts)
+            if day < self.last_day:
+                return False
+            if day == self.last_day:
+                if (high, low, close) == (self.highs[-1], self.lows[-1], self.last_close):
+                    return False
+                self._undo_last()
+
+        # Somas móveis: entra o novo, sai o mais antigo (se a janela estiver cheia)
+        self.prev_trend, self.prev_hilo, self.dropped = self.trend, self.hilo, None
+        if len(self.highs) == self.period:
+            self.dropped = (self.highs[0], self.lows[0])
+            self.sum_high -= self.highs[0]
+            self.sum_low -= self.lows[0]
+        self.highs.append(high)
+        self.lows.append(low)
+        self.sum_high += high
+        self.sum_low += low
+
+        self.count += 1
+        self.last_close = close
+        self.last_date = ts
+
+        if self.count > self.period:
+            self.trend, self.hilo = self._step(self.trend or -1, self.last_close, self.sma_high, self.sma_low)
+        return True
+
+    def _undo_last(self):
+        """Desfaz o último candle aplicado (usado na revisão do candle do dia)."""
+        self.sum_high -= self.highs.pop()
+        self.sum_low -= self.lows.pop()
+        if self.dropped:
+            self.highs.appendleft(self.dropped[0])
+            self.lows.appendleft(self.dropped[1])
+            self.sum_high += self.dropped[0]
+            self.sum_low += self.dropped[1]
+        self.count -= 1
+        self.trend, self.hilo = self.prev_trend, self.prev_hilo
+
+    def peek(self, high: float, low: float, close: float):
+        """
+        Simula um candle (ex: parcial intraday) sem alterar o estado.
+        Retorna (hilo, trend) que o HiLo teria se esse candle fechasse agora.
+        """
+        if self.count < self.period:
+            return self.hilo, self.trend
+
+        sma_high = (self.sum_high - self.highs[0] + float(high)) / self.period
+        sma_low = (self.sum_low - self.lows[0] + float(low)) / self.period
+        trend, hilo = self._step(self.trend or -1, float(close), sma_high, sma_low)
+        return hilo, trend
+
+    def flip_trigger(self, proximity: float = 0.005):
+        """
+        Preço de virada para o próximo pregão (mesma regra de analyze_asset):
+        - Alta (1): vira para Baixa se o preço fechar/negociar <= HiLo ('SELL')
+        - Baixa (-1): vira para Alta se o preço for > HiLo ('BUY')
+        Faixa de proximidade: |preço - HiLo| / preço < proximity, ou seja,
+        HiLo / (1 + proximity) < preço < HiLo / (1 - proximity).
+        Retorna None se o estado ainda não tem tendência.
+        """
+        if not self.is_ready:
+            return None
+        hilo = float(self.hilo)
+        band_low, band_high = self.proximity_band(hilo, proximity)
+        return {
+            "ticker": self.ticker,
+            "period": self.period,
+            "trend": int(self.trend),
+            "trigger_price": hilo,
+            "direction": "SELL" if self.trend == 1 else "BUY",
+            "band_low": band_low,
+            "band_high": band_high,
+            "last_close": self.last_close,
+            "candle_date": self.last_day.isoformat() if self.last_date is not None else None,
+        }
+
+    @staticmethod
+    def proximity_band(hilo: float, proximity: float = 0.005) -> tuple:
+        """Faixa (mínimo, máximo) de preços a menos de `proximity` do HiLo."""
+        return hilo / (1 + proximity), hilo / (1 - proximity)
+
+    @staticmethod
+    def _step(trend, close, sma_high, sma_low):
+        """Um passo da recorrência do HiLo. Retorna (trend, hilo)."""
+        if trend == -1:
+            if close > sma_high:
+                return 1, sma_low
+            return -1, sma_high
+        if close < sma_low:
+            return -1, sma_high
+        return 1, sma_low
+
+    # --- Construção / Persistência ---
+
+    @classmethod
+    def from_candles(cls, ticker: str, candles: list, period: int = 10):
+        """
+        Inicializa o estado a partir do histórico completo (cold start).
+        Usa o cálculo vetorizado e guarda apenas a janela final.
+        """
+        state = cls(ticker, period)
+        if not candles:
+            return state
+
+        df = pd.DataFrame(candles)
+        df_hilo = Indicators.calculate_hilo(df, period=state.period)
+        if 'trend' not in df_hilo.columns:
+            df_hilo['hilo'] = float('nan')
+            df_hilo['trend'] = 0
+
+        state._seed(
+            dates=df_hilo['date'].tolist() if 'date' in df_hilo.columns else [None] * len(df_hilo),
+            highs=df_hilo['high'].tolist(),
+            lows=df_hilo['low'].tolist(),
+            closes=df_hilo['close'].tolist(),
+            hilos=df_hilo['hilo'].tolist(),
+            trends=df_hilo['trend'].tolist()
+        )
+        return state
+
+    @classmethod
+    def from_panel(cls, candles_by_ticker: dict, period: int = 10) -> dict:
+        """
+        Inicializa o estado de vários ativos de uma vez (cold start em lote),
+        usando `Indicators.calculate_hilo_panel` em um único passe 2-D.
+        Retorna {ticker: HiLoState}.
+        """
+        panel = Indicators.candles_to_panel(candles_by_ticker)
+        out = Indicators.calculate_hilo_panel(panel['high'], panel['low'], panel['close'], period=period)
+
+        states = {}
+        for row, ticker in enumerate(panel['tickers']):
+            valid = ~np.isnan(panel['close'][row])
+            state = cls(ticker, period)
+            state._seed(
+                dates=panel['date'][row][valid].tolist(),
+                highs=panel['high'][row][valid].tolist(),
+                lows=panel['low'][row][valid].tolist(),
+                closes=panel['close'][row][valid].tolist(),
+                hilos=out['hilo'][row][valid].tolist(),
+                trends=out['trend'][row][valid].tolist()
+            )
+            states[ticker] = state
+        return states
+
+    def _seed(self, dates, highs, lows, closes, hilos, trends):
+        """Preenche o estado a partir das séries já calculadas (guarda só a janela final)."""
+        n = len(closes)
+        if n == 0:
+            return
+
+        self.highs.extend(float(h) for h in highs[-self.period:])
+        self.lows.extend(float(l) for l in lows[-self.period:])
+        self.sum_high = float(sum(self.highs))
+        self.sum_low = float(sum(self.lows))
+        self.count = n
+        self.last_close = float(closes[-1])
+        self.last_date = _as_timestamp(dates[-1])
+
+        if int(trends[-1]) != 0:
+            self.trend = int(trends[-1])
+            self.hilo = float(hilos[-1])
+
+        # Permite revisar o último candle (mesmo dia) sem reconstruir o histórico
+        if n > self.period:
+            self.dropped = (float(highs[-self.period - 1]), float(lows[-self.period - 1]))
+        if n > 1:
+            self.prev_trend = int(trends[-2])
+            self.prev_hilo = None if pd.isna(hilos[-2]) else float(hilos[-2])
+
+    def to_dict(self) -> dict:
+        return {
+            "ticker": self.ticker,
+            "period": self.period,
+            "highs": list(self.highs),
+            "lows": list(self.lows),
+            "count": self.count,
+            "trend": self.trend,
+            "hilo": self.hilo,
+            "last_close": self.last_close,
+            "last_date": self.last_date,
+            "prev_trend": self.prev_trend,
+            "prev_hilo": self.prev_hilo,
+            "dropped": list(self.dropped) if self.dropped else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        state = cls(data['ticker'], data.get('period', 10))
+        state.highs.extend(float(x) for x in data.get('highs', []))
+        state.lows.extend(float(x) for x in data.get('lows', []))
+        state.sum_high = float(sum(state.highs))
+        state.sum_low = float(sum(state.lows))
+        state.count = int(data.get('count', len(state.highs)))
+        state.trend = int(data.get('trend', 0))
+        state.hilo = data.get('hilo')
+        state.last_close = data.get('last_close')
+        state.last_date = data.get('last_date')
+        state.prev_trend = int(data.get('prev_trend', 0))
+        state.prev_hilo = data.get('prev_hilo')
+        dropped = data.get('dropped')
+        state.dropped = (float(dropped[0]), float(dropped[1])) if dropped else None
+        return state
+
+
+def _as_timestamp(value):
+    """Normaliza datas de candle (unix, Timestamp ou datetime) para unix int."""
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return None
+    if isinstance(value, numbers.Real):
+        return int(value)
+    return int(pd.Timestamp(value).timestamp())
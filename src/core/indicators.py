@@ -1,61 +1,247 @@
 import pandas as pd
 import numpy as np
+from datetime import datetime, timezone
+
+
+def candle_day(ts):
+    """
+    Dia de um candle (timestamp unix), sempre no calendário UTC: o mesmo em
+    qualquer processo (GitHub Actions, dashboard local) e igual ao de `candle_days`.
+    """
+    return datetime.fromtimestamp(int(ts), tz=timezone.utc).date()
+
+
+def candle_days(timestamps: pd.Series) -> pd.Series:
+    """Versão vetorizada de `candle_day` (datetime64 à meia-noite UTC)."""
+    return pd.to_datetime(timestamps, unit='s').dt.normalize()
+
 
 class Indicators:
     @staticmethod
     def calculate_hilo(df: pd.DataFrame, period: int = 10) -> pd.DataFrame:
         """
         Calcula o HiLo Activator (High Low Activator) de X períodos.
-        
+
         Lógica:
-        - HiLo Top (Stop de Venda) = SMA das Máximas 
+        - HiLo Top (Stop de Venda) = SMA das Máximas
         - HiLo Bottom (Stop de Compra) = SMA das Mínimas
         - Se Fechamento > Top -> Tendência UP (desenha Bottom)
         - Se Fechamento < Bottom -> Tendência DOWN (desenha Top)
-        
+
         Retorna o DataFrame com colunas adicionais: 'hilo', 'trend' (1 = Alta, -1 = Baixa)
         """
         # Garante que temos dados suficientes
         if len(df) < period:
             return df
-        
+
         # 1. Calcular as médias móveis simples de High e Low
         # Testando SEM shift para ver se bate com Profit
         df['sma_high'] = df['high'].rolling(window=period).mean()
         df['sma_low'] = df['low'].rolling(window=period).mean()
-        
-        # 2. Inicializar colunas
-        df['hilo'] = np.nan
-        df['trend'] = 0 # 0 = undefined, 1 = up, -1 = down
-        
-        # 3. Iterar para definir a tendência (HiLo é path-dependent)
-        
-        trend = -1 # Default inicial
-        # Warmup inicial
-        hilo_val = df['sma_high'].iloc[period] 
-        
-        # Começamos a iterar a partir do ponto onde temos dados (period)
-        for i in range(period, len(df)):
-            close = df['close'].iloc[i]
-            high_sma = df['sma_high'].iloc[i]
-            low_sma = df['sma_low'].iloc[i]
-            
-            # Lógica Alternativa: Comparar com as SMAs diretamente
-            if trend == -1: # Tendência de Baixa
-                if close > high_sma:
-                    trend = 1 # Flip para Alta
-                    hilo_val = low_sma
-                else:
-                    hilo_val = high_sma
-            
-            elif trend == 1: # Tendência de Alta
-                if close < low_sma:
-                    trend = -1 # Flip para Baixa
-                    hilo_val = high_sma
-                else:
-                    hilo_val = low_sma
-            
-            df.at[df.index[i], 'hilo'] = hilo_val
-            df.at[df.index[i], 'trend'] = trend
+
+        # 2. Rodar a máquina de estados sobre arrays NumPy (HiLo é path-dependent)
+        hilo, trend = Indicators.hilo_kernel(
+            df['close'].to_numpy(dtype=np.float64),
+            df['sma_high'].to_numpy(dtype=np.float64),
+            df['sma_low'].to_numpy(dtype=np.float64),
+            start=period
+        )
+
+        df['hilo'] = hilo
+        df['trend'] = trend # 0 = undefined, 1 = up, -1 = down
 
         return df
+
+    @staticmethod
+    def hilo_kernel(close: np.ndarray, sma_high: np.ndarray, sma_low: np.ndarray, start: int):
+        """
+        Máquina de estados do HiLo sobre arrays contíguos.
+
+        A tendência começa em -1 no índice `start` e só vira quando:
+        - Baixa (-1) e Fechamento > SMA High -> Alta (1)
+        - Alta (1) e Fechamento < SMA Low -> Baixa (-1)
+        O HiLo desenhado é a SMA Low na alta e a SMA High na baixa.
+
+        Retorna (hilo, trend) com o mesmo tamanho da entrada.
+        Antes de `start`: hilo = NaN e trend = 0.
+        """
+        n = len(close)
+        hilo = np.full(n, np.nan)
+        trend = np.zeros(n, dtype=np.int64)
+
+        if start >= n:
+            return hilo, trend
+
+        c = close[start:]
+        up = c > sma_high[start:]   # Comparações com NaN são False (sem virada)
+        down = c < sma_low[start:]
+        t = Indicators._trend_from_events(up[None, :], down[None, :])[0]
+
+        trend[start:] = t
+        hilo[start:] = np.where(t == 1, sma_low[start:], sma_high[start:])
+        return hilo, trend
+
+    @staticmethod
+    def calculate_hilo_panel(high, low, close, period: int = 10, mask=None) -> dict:
+        """
+        HiLo para um universo inteiro de ativos em um único passe 2-D.
+
+        Entradas são matrizes (ativos x datas) de máximas, mínimas e fechamentos.
+        `mask` marca as células válidas (padrão: sem NaN); dias faltantes e
+        históricos de tamanhos diferentes (ragged) são ignorados por ativo, de
+        modo que cada linha equivale a `calculate_hilo` sobre os seus próprios candles.
+
+        Retorna dict com matrizes 'sma_high', 'sma_low', 'hilo' e 'trend'
+        (células inválidas ou sem tendência: NaN / 0).
+        """
+        high = np.asarray(high, dtype=np.float64)
+        low = np.asarray(low, dtype=np.float64)
+        close = np.asarray(close, dtype=np.float64)
+
+        valid = ~(np.isnan(high) | np.isnan(low) | np.isnan(close))
+        if mask is not None:
+            valid &= np.asarray(mask, dtype=bool)
+
+        n_assets, n_dates = close.shape
+        out = {
+            'sma_high': np.full((n_assets, n_dates), np.nan),
+            'sma_low': np.full((n_assets, n_dates), np.nan),
+            'hilo': np.full((n_assets, n_dates), np.nan),
+            'trend': np.zeros((n_assets, n_dates), dtype=np.int64),
+        }
+        if n_assets == 0 or n_dates < period:
+            return out
+
+        # 1. Compactar: candles válidos de cada ativo à esquerda, na ordem original
+        order = np.argsort(~valid, axis=1, kind='stable')
+        counts = valid.sum(axis=1)
+        pos = np.arange(n_dates)
+        in_range = pos[None, :] < counts[:, None]
+
+        h = np.where(in_range, np.take_along_axis(high, order, axis=1), np.nan)
+        l = np.where(in_range, np.take_along_axis(low, order, axis=1), np.nan)
+        c = np.where(in_range, np.take_along_axis(close, order, axis=1), np.nan)
+
+        # 2. Médias móveis ao longo do eixo do tempo
+        sma_high = np.full((n_assets, n_dates), np.nan)
+        sma_low = np.full((n_assets, n_dates), np.nan)
+        windows = np.lib.stride_tricks.sliding_window_view
+        sma_high[:, period - 1:] = windows(h, period, axis=1).sum(axis=-1) / period
+        sma_low[:, period - 1:] = windows(l, period, axis=1).sum(axis=-1) / period
+
+        # 3. Recorrência da tendência para todos os ativos de uma vez
+        t = np.zeros((n_assets, n_dates), dtype=np.int64)
+        if n_dates > period:
+            active = in_range[:, period:]
+            up = (c[:, period:] > sma_high[:, period:]) & active
+            down = (c[:, period:] < sma_low[:, period:]) & active
+            t[:, period:] = np.where(active, Indicators._trend_from_events(up, down), 0)
+        hilo_c = np.where(t == 1, sma_low, np.where(t == -1, sma_high, np.nan))
+
+        # 4. Devolver cada valor para a sua data original
+        for key, compact in (('sma_high', sma_high), ('sma_low', sma_low), ('hilo', hilo_c), ('trend', t)):
+            np.put_along_axis(out[key], order, compact, axis=1)
+        return out
+
+    @staticmethod
+    def hilo_sweep(df: pd.DataFrame, periods=range(3, 61)) -> pd.DataFrame:
+        """
+        Calcula a tendência do HiLo para vários períodos em uma única chamada.
+
+        Usa somas acumuladas (prefix sums) de máximas e mínimas: a SMA de
+        qualquer período sai de uma subtração por candle, sem novo rolling.
+        Retorna uma matriz compacta (períodos x datas) com a tendência
+        (1 = Alta, -1 = Baixa, 0 = sem dados suficientes).
+        """
+        periods = np.asarray(list(periods), dtype=np.int64)
+        close = df['close'].to_numpy(dtype=np.float64)
+        n = len(close)
+        columns = df['date'] if 'date' in df.columns else df.index
+
+        trend = np.zeros((len(periods), n), dtype=np.int8)
+        if n == 0 or len(periods) == 0:
+            return pd.DataFrame(trend, index=pd.Index(periods, name='period'), columns=columns)
+
+        cs_high = np.concatenate(([0.0], np.cumsum(df['high'].to_numpy(dtype=np.float64))))
+        cs_low = np.concatenate(([0.0], np.cumsum(df['low'].to_numpy(dtype=np.float64))))
+
+        # SMA[p, t] = (cs[t + 1] - cs[t + 1 - p]) / p  (válida para t >= p - 1)
+        pos = np.arange(n)
+        lag = pos[None, :] + 1 - periods[:, None]
+        ready = lag >= 0
+        lag = np.maximum(lag, 0)
+        sma_high = (cs_high[pos + 1][None, :] - cs_high[lag]) / periods[:, None]
+        sma_low = (cs_low[pos + 1][None, :] - cs_low[lag]) / periods[:, None]
+
+        # A recorrência começa no índice `period`, como em calculate_hilo
+        active = ready & (pos[None, :] >= periods[:, None])
+        up = (close[None, :] > sma_high) & active
+        down = (close[None, :] < sma_low) & active
+        trend[:] = np.where(active, Indicators._trend_from_events(up, down), 0)
+
+        return pd.DataFrame(trend, index=pd.Index(periods, name='period'), columns=columns)
+
+    @staticmethod
+    def candles_to_panel(candles_by_ticker: dict) -> dict:
+        """
+        Alinha candles da Brapi ({ticker: [{'date', 'high', 'low', 'close'}, ...]})
+        em matrizes ativos x datas (por dia). Dias sem candle ficam NaN.
+
+        Retorna dict com 'tickers', 'days' e as matrizes 'date', 'high', 'low', 'close'.
+        """
+        tickers = list(candles_by_ticker.keys())
+        frames = []
+        for row, ticker in enumerate(tickers):
+            df = pd.DataFrame(candles_by_ticker[ticker] or [], columns=['date', 'high', 'low', 'close'])
+            df['row'] = row
+            frames.append(df)
+
+        if not frames:
+            empty = np.empty((0, 0))
+            return {'tickers': [], 'days': [], 'date': empty, 'high': empty, 'low': empty, 'close': empty}
+
+        data = pd.concat(frames, ignore_index=True).dropna(subset=['date'])
+        data['day'] = candle_days(data['date'])
+        # Um candle por ativo/dia (o mais recente prevalece)
+        data = data.drop_duplicates(subset=['row', 'day'], keep='last')
+
+        days = np.sort(data['day'].unique())
+        col = np.searchsorted(days, data['day'].to_numpy())
+        row = data['row'].to_numpy()
+
+        panel = {'tickers': tickers, 'days': days}
+        for field in ('date', 'high', 'low', 'close'):
+            matrix = np.full((len(tickers), len(days)), np.nan)
+            matrix[row, col] = data[field].to_numpy(dtype=np.float64)
+            panel[field] = matrix
+        return panel
+
+    @staticmethod
+    def _trend_from_events(up: np.ndarray, down: np.ndarray) -> np.ndarray:
+        """
+        Tendência (linhas x tempo) a partir dos eventos de virada, começando em Baixa.
+        Histerese: vale a tendência do último evento. Linhas com sinais conflitantes
+        (SMA High < SMA Low) dependem do estado anterior e usam a recorrência escalar.
+        """
+        events = np.where(up, 1, np.where(down, -1, 0))
+        idx = np.where(events != 0, np.arange(events.shape[1])[None, :], -1)
+        np.maximum.accumulate(idx, axis=1, out=idx)
+        trend = np.where(idx >= 0, np.take_along_axis(events, np.maximum(idx, 0), axis=1), -1)
+
+        for r in np.flatnonzero((up & down).any(axis=1)):
+            trend[r] = Indicators._hilo_trend_loop(up[r], down[r])
+        return trend
+
+    @staticmethod
+    def _hilo_trend_loop(up: np.ndarray, down: np.ndarray) -> np.ndarray:
+        """Recorrência escalar da tendência (fallback para sinais conflitantes)."""
+        out = np.empty(len(up), dtype=np.int64)
+        trend = -1
+        for i, (is_up, is_down) in enumerate(zip(up.tolist(), down.tolist())):
+            if trend == -1:
+                if is_up:
+                    trend = 1
+            elif is_down:
+                trend = -1
+            out[i] = trend
+        return out
@@ -0,0 +1,97 @@
+from src.core.alert_engine import AlertEngine
+from src.services.brapi import BrapiClient
+from src.services.repository import Repository
+
+class IntradayChecker:
+    """
+    Verificação intraday leve a partir dos gatilhos pré-calculados no fechamento
+    (tabela 'flip_triggers') e das metas de lucro da carteira aberta.
+    Todos os níveis ficam no AlertEngine; cada rodada faz uma cotação em lote
+    (ativos + opções) e só os ativos com alerta cruzado passam pela análise
+    completa do MarketScanner (opção sugerida, gravação e notificação).
+    """
+
+    def __init__(self, scanner=None):
+        self.scanner = scanner
+        self.brapi = scanner.brapi if scanner else BrapiClient()
+        self.repository = scanner.repository if scanner else Repository()
+        self.engine = AlertEngine()
+
+    def load(self, tickers: list = None) -> int:
+        """
+        (Re)carrega os alertas: virada e proximidade de cada gatilho salvo e
+        meta de lucro de cada opção em carteira. Os últimos preços avaliados
+        são mantidos, então chamadas repetidas só disparam cruzamentos novos.
+        Retorna a quantidade de alertas ativos.
+        """
+        self.engine.clear()
+
+        for trigger in (self.repository.get_flip_triggers(tickers) or {}).values():
+            self.engine.add_flip(trigger)
+
+        if self.scanner:
+            positions = self.repository.get_open_positions() or {}
+            for asset, asset_positions in positions.items():
+                if tickers is not None and asset not in tickers:
+                    continue
+                for pos in asset_positions:
+                    if float(pos.get('entry_price') or 0) > 0:
+                        self.engine.add_profit_target(pos, self.scanner.profit_target, ticker_asset=asset)
+
+        return len(self.engine)
+
+    def check(self, tickers: list = None, analyze: bool = True) -> dict:
+        """
+        Cota todos os tickers com alerta e avalia os cruzamentos desde a
+        execução anterior do dia (preços salvos em 'intraday_prices').
+        Retorna {'checked', 'flips', 'proximity', 'targets', 'results'}:
+        - flips: [(ticker, direção, preço, gatilho)] que cruzaram o HiLo
+        - proximity: [(ticker, preço, gatilho)] que entraram na faixa de 0.5%
+        - targets: [(opção, ativo base, preço, preço-alvo)] que bateram a meta de lucro
+        - results: análises completas dos ativos com virada ou meta (se analyze=True)
+        """
+        if not self.load(tickers):
+            print("⚠️ Nenhum gatilho de virada salvo (rode a varredura de fechamento antes).")
+            return {'checked': 0, 'flips': [], 'proximity': [], 'targets': [], 'results': []}
+
+        # Preço anterior = o da execução anterior do mesmo pregão (cada rodada é um processo novo):
+        # só dispara o que cruzou desde então, sem repetir virada/meta já avisadas
+        tickers_quoted = self.engine.tickers
+        self.engine.seed(self.repository.get_intraday_prices(tickers_quoted))
+        previous = self.engine.last_prices(tickers_quoted)
+
+        quotes = self.brapi.get_quotes(tickers_quoted)
+        fired = self.engine.evaluate(quotes)
+        self.repository.save_intraday_prices(self.engine.last_prices(list(quotes)))
+
+        flips, proximity, targets = [], [], []
+        for alert in fired:
+            if alert['kind'] == 'flip':
+                flips.append((alert['ticker'], alert['direction'], alert['price'], alert['level']))
+            elif alert['kind'] == 'proximity':
+                proximity.append((alert['ticker'], alert['price'], alert['trigger_price']))
+            elif alert['kind'] == 'profit_target':
+                targets.append((alert['ticker'], alert['ticker_asset'], alert['price'], alert['level']))
+
+        print(f"⚡ Intraday: {len(quotes)} cotações | {len(flips)} virada(s) | "
+              f"{len(proximity)} perto do HiLo | {len(targets)} meta(s) de lucro")
+        for ticker, direction, price, level in flips:
+            print(f"\t🚨 {ticker}: {'ALTA' if direction == 'BUY' else 'BAIXA'} (R$ {price:.2f} x HiLo R$ {level:.2f})")
+        for ticker, price, trigger_price in proximity:
+            print(f"\t⚠️ {ticker}: R$ {price:.2f} perto da virada (R$ {trigger_price:.2f})")
+        for ticker_option, asset, price, level in targets:
+            print(f"\t💰 {ticker_option} ({asset}): R$ {price:.2f} >= alvo R$ {level:.2f}")
+
+        # Entradas na faixa de proximidade: uma mensagem por execução
+        if proximity and self.scanner:
+            self.scanner.notifier.send_proximity_alert(proximity)
+
+        results = []
+        to_analyze = list(dict.fromkeys([t for t, *_ in flips] + [asset for _, asset, *_ in targets if asset]))
+        if analyze and to_analyze and self.scanner:
+            # Mesmas cotações e mesmo preço anterior: a reanálise só alerta as metas que
+            # cruzaram agora (não as posições que já estavam acima da meta)
+            results = self.scanner.scan(to_analyze, quotes=quotes, previous=previous)
+
+        return {'checked': len(quotes), 'flips': flips, 'proximity': proximity, 'targets': targets,
+                'results': results}
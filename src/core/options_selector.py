@@ -1,35 +1,39 @@
 from datetime import datetime, timedelta
+import numpy as np
 import pandas as pd
-import math
+from src.core.black_scholes import BlackScholes
 
 class OptionsSelector:
     def __init__(self):
         pass
 
-    def _calculate_bs_delta(self, S, K, days, r=0.1125, sigma=0.32, type_='CALL'):
+    @staticmethod
+    def estimate_iv_delta(df: pd.DataFrame, current_price: float):
         """
-        Estima Delta usando Black-Scholes.
-        S: Preço Ativo, K: Strike, days: Dias úteis (DTE), r: Taxa Livre Risco (11.25%), sigma: Volatilidade (32%)
+        Volatilidade implícita de cada opção (a partir do 'lastPrice') e o Delta
+        Black-Scholes calculado com essa IV, tudo vetorizado para a cadeia inteira.
+        Opções sem negócios ou sem preço ficam com IV NaN e usam a vol padrão (32%).
+        Retorna (iv, delta) como arrays.
         """
-        if days <= 0 or S <= 0 or K <= 0: return 0.0
-        T = days / 365.0
-        try:
-            d1 = (math.log(S/K) + (r + 0.5*sigma**2)*T) / (sigma*math.sqrt(T))
-            # Aproximação da CDF Normal usando math.erf
-            cdf_d1 = 0.5 * (1 + math.erf(d1 / math.sqrt(2)))
-            
-            if type_ == 'CALL':
-                return cdf_d1
-            else:
-                return cdf_d1 - 1
-        except Exception:
-            return 0.0
+        n = len(df)
+        strikes = pd.to_numeric(df['strike'], errors='coerce').to_numpy(dtype=np.float64)
+        days = df['dte'].to_numpy(dtype=np.float64)
+        is_call = (df['type'] == 'CALL').to_numpy()
+
+        premium = pd.to_numeric(df['lastPrice'], errors='coerce').to_numpy(dtype=np.float64) if 'lastPrice' in df.columns else np.full(n, np.nan)
+        trades = pd.to_numeric(df['trades'], errors='coerce').fillna(0).to_numpy() if 'trades' in df.columns else np.zeros(n)
+        premium = np.where(trades > 0, premium, np.nan) # Último preço de opção sem negócios não é confiável
+
+        iv = BlackScholes.implied_vol(premium, current_price, strikes, days, is_call=is_call)
+        sigma = np.where(np.isnan(iv), BlackScholes.DEFAULT_VOL, iv)
+        delta = BlackScholes.delta(current_price, strikes, days, sigma=sigma, is_call=is_call)
+        return iv, delta
 
     def filter_options(self, options_list, current_price, signal_type):
         """
         Filtra a melhor opção com base no setup Vencedor:
         - Vencimento: 30 a 75 dias (Mensal).
-        - Delta: 0.42 a 0.50 (Calculado via Black-Scholes Vol 32%).
+        - Delta: 0.42 a 0.50 (Black-Scholes com a IV de cada strike; sem IV, Vol 32%).
         - Liquidez: Tie-breaker.
         """
         if not options_list:
@@ -57,15 +61,8 @@ class OptionsSelector:
         if df_type.empty:
             return None
 
-        # 5. Calcular Delta Black-Scholes
-        df_type['delta_bs'] = df_type.apply(
-            lambda row: self._calculate_bs_delta(
-                S=current_price,
-                K=float(row['strike']),
-                days=row['dte'],
-                type_=row['type']
-            ), axis=1
-        )
+        # 5. Calcular IV por strike e Delta Black-Scholes (vetorizado para a cadeia inteira)
+        df_type['iv'], df_type['delta_bs'] = self.estimate_iv_delta(df_type, current_price)
 
         # 6. Filtrar Range Delta 0.40 - 0.50 (User Request)
         if target_type == "CALL":
@@ -112,5 +109,6 @@ class OptionsSelector:
             "dte": best_option['dte'],
             "trades": int(best_option.get('trades', 0)),
             "last_price": float(best_option.get('lastPrice', 0.0)),
-            "delta_bs": float(best_option['delta_bs'])
+            "delta_bs": float(best_option['delta_bs']),
+            "iv": None if pd.isna(best_option['iv']) else float(best_option['iv'])
         }
@@ -1,46 +1,227 @@
-import pandas as pd
-from datetime import datetime
+import contextvars
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, date as dt_date
+from src.config import Config
 from src.services.brapi import BrapiClient
-from src.core.indicators import Indicators
+from src.core.alert_engine import AlertEngine
+from src.core.hilo_state import HiLoState
+from src.core.indicators import candle_day
 from src.core.options_selector import OptionsSelector
-from src.services.repository import Repository
+from src.services.repository import Repository, BufferedRepository
 from src.services.notification_service import NotificationService
+from src.services.scan_jobs import capture_stdout
 
 class MarketScanner:
-    def __init__(self, hilo_period: int = 10, profit_target: float = 50.0):
+    PROXIMITY_PCT = 0.005  # Alerta de proximidade: preço a menos de 0.5% do HiLo
+
+    def __init__(self, hilo_period: int = 10, profit_target: float = 50.0, max_workers: int = None,
+                 buffered: bool = False):
         self.brapi = BrapiClient()
         self.selector = OptionsSelector()
-        self.repository = Repository()
+        # buffered=True: sinais gravados em lote no fim do scan (write-behind)
+        self.buffered = buffered
+        self.repository = BufferedRepository() if buffered else Repository()
         self.notifier = NotificationService()
         self.hilo_period = hilo_period
         self.profit_target = profit_target
+        self.max_workers = max(1, int(max_workers or Config.SCAN_CONCURRENCY))
+        self._states = {}  # Estados HiLo preparados por warm_up() (ticker -> HiLoState)
+        self._positions = None  # Posições abertas por ativo, carregadas por load_portfolio()
+        self._quotes = None  # Cotações buscadas em lote no início do scan em andamento
+        self._previous = None  # Preço anterior por ticker para os alertas de meta/proximidade do scan
+
+    def scan(self, tickers: list, on_progress=None, quotes: dict = None, previous: dict = None):
+        """
+        Analisa vários ativos em paralelo (até `max_workers` ao mesmo tempo).
+        Erros ficam isolados por ativo; os resultados mantêm a ordem de `tickers`.
+        on_progress(ticker, concluídos, total) é chamado ao fim de cada ativo.
+        :param quotes: cotações já buscadas (ex: verificação intraday), usadas sem nova consulta.
+        :param previous: preço anterior de cada ticker para os alertas de meta de lucro e
+            proximidade: só alerta o que cruzou desde então. Sem ele vale o estado atual.
+        """
+        done = [0]
+        done_lock = threading.Lock()
+
+        def run(ticker):
+            # Log do ativo acumulado e escrito de uma vez ao final (sem intercalar com as outras threads)
+            try:
+                with capture_stdout() as log:
+                    print(f"🔄 Processando {ticker} (HiLo {self.hilo_period})...")
+                    return self.analyze_asset(ticker)
+            finally:
+                sys.stdout.write(log.getvalue())
+                if on_progress:
+                    with done_lock:
+                        done[0] += 1
+                        count = done[0]
+                    on_progress(ticker, count, len(tickers))
+
+        # Carteira inteira em uma consulta + cotações (ativos e opções em carteira) em um único lote;
+        # durante a análise tudo isso vem da memória (o lote vale até o fim do scan, mesmo
+        # que a varredura demore mais que o TTL do cache de cotações)
+        option_tickers = self.load_portfolio()
+        self._quotes = dict(quotes or {})
+        missing = [t for t in list(tickers) + option_tickers if t not in self._quotes]
+        if missing:
+            self._quotes.update(self.brapi.get_quotes(missing))
+        self._previous = previous
+
+        results = []
+        try:
+            for ticker, result, error in self._map(run, tickers):
+                if error:
+                    print(f"❌ Erro ao analisar {ticker}: {error}")
+                elif result:
+                    results.append(result)
+        finally:
+            # Write-behind: grava os sinais do scan em um único lote (também em caso de falha)
+            self.flush()
+            self._quotes = None
+            self._previous = None
+        return results
+
+    def flush(self):
+        """Grava os sinais pendentes (modo buffered). Retorna {ticker: (signal_id, is_new)}."""
+        if not self.buffered:
+            return {}
+        return self.repository.flush()
+
+    @property
+    def write_errors(self) -> list:
+        """Falhas de gravação acumuladas no modo buffered (para o resumo da execução)."""
+        return list(self.repository.errors) if self.buffered else []
+
+    def save_flip_triggers(self, tickers: list):
+        """
+        Pré-calcula (no fechamento) o preço de virada e a faixa de proximidade
+        de cada ativo e grava em lote para o verificador intraday.
+        Retorna a lista de gatilhos gravados.
+        """
+        triggers = []
+        for ticker in tickers:
+            state = self._states.get(ticker) or self._get_hilo_state(ticker)
+            trigger = state.flip_trigger(self.PROXIMITY_PCT) if state else None
+            if trigger:
+                triggers.append(trigger)
+
+        if triggers and self.repository.save_flip_triggers(triggers):
+            print(f"🎯 {len(triggers)} gatilho(s) de virada salvos para o intraday.")
+        return triggers
+
+    def load_portfolio(self):
+        """
+        Carrega todas as posições abertas de uma vez (indexadas por ativo base).
+        Retorna a lista de opções em carteira para cotação em lote.
+        Se a consulta falhar, analyze_asset volta a buscar por ativo.
+        """
+        self._positions = self.repository.get_open_positions()
+        if not self._positions:
+            return []
+        return [pos['ticker_option'] for positions in self._positions.values() for pos in positions]
+
+    def _get_quotes(self, tickers: list) -> dict:
+        """
+        Cotações do lote buscado no início do scan; só os tickers que não vieram
+        no lote (ou fora de um scan) vão à Brapi / cache de cotações.
+        """
+        quotes = self._quotes or {}
+        found = {t: quotes[t] for t in tickers if t in quotes}
+        missing = [t for t in tickers if t not in quotes]
+        if missing:
+            found.update(self.brapi.get_quotes(missing))
+        return found
+
+    def _map(self, fn, items: list):
+        """
+        Executa fn(item) em um pool de threads limitado.
+        Retorna [(item, resultado, erro)] na mesma ordem da entrada.
+        """
+        if self.max_workers <= 1 or len(items) <= 1:
+            out = []
+            for item in items:
+                try:
+                    out.append((item, fn(item), None))
+                except Exception as e:
+                    out.append((item, None, e))
+            return out
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(items))) as pool:
+            # Cada tarefa roda numa cópia do contexto atual (ex: log roteado para o job do dashboard)
+            futures = [pool.submit(contextvars.copy_context().run, fn, item) for item in items]
+            out = []
+            for item, future in zip(items, futures):
+                try:
+                    out.append((item, future.result(), None))
+                except Exception as e:
+                    out.append((item, None, e))
+        return out
+
+    def warm_up(self, tickers: list):
+        """
+        Prepara o estado HiLo de todo o universo antes da varredura.
+        Os candles são baixados em lote (vários tickers por requisição): os estados
+        salvos avançam só com os candles novos e os ativos sem estado válido são
+        calculados juntos em um único passe 2-D (HiLoState.from_panel).
+        """
+        saved = self.repository.get_hilo_states(tickers)
+        changed = []  # Estados novos/avançados, gravados juntos em um único upsert no fim
+
+        # 1. Estados salvos: agrupa por range necessário e busca os candles recentes em lote
+        by_range = {}
+        for ticker in tickers:
+            state = HiLoState.from_dict(saved[ticker]) if saved.get(ticker) else None
+            recent_range = self._recent_range(state)
+            if recent_range:
+                by_range.setdefault(recent_range, {})[ticker] = state
+
+        for recent_range, states in by_range.items():
+            recents = self.brapi.get_historical_data_batch(list(states), range=recent_range, interval='1d')
+            for ticker, state in states.items():
+                usable, updated = self._apply_recent(state, recents.get(ticker))
+                if usable:
+                    self._states[ticker] = state
+                if updated:
+                    changed.append(state)
+
+        # 2. Cold start em lote para quem não tem estado utilizável
+        cold = [t for t in tickers if t not in self._states]
+        if cold:
+            print(f"\t🧮 Calculando HiLo em lote para {len(cold)} ativos sem estado salvo...")
+            histories = self.brapi.get_historical_data_batch(cold, range='3mo', interval='1d')
+
+            for ticker, state in HiLoState.from_panel(histories, period=self.hilo_period).items():
+                if state.is_ready:
+                    self._states[ticker] = state
+                    changed.append(state)
+
+        if changed:
+            self.repository.save_hilo_states([state.to_dict() for state in changed])
 
     def analyze_asset(self, ticker: str, force_notification: bool = False):
         """
         Analisa um ativo específico para buscar sinais de HiLo e gerenciar posições.
         """
-        from datetime import date as dt_date
-        
-        # 1. Buscar dados históricos (SEM candle sintético para não distorcer HiLo)
-        raw_data = self.brapi.get_historical_data(ticker, range='3mo', interval='1d', include_today=False)
-        
-        if not raw_data:
+        # 1-3. Estado HiLo incremental (só processa candles novos desde a última execução)
+        state = self._get_hilo_state(ticker)
+
+        if not state or not state.is_ready:
+            print(f"\t⚠️ Histórico insuficiente para calcular HiLo de {ticker}")
             return None
 
-        # 2. Converter para DataFrame
-        df = pd.DataFrame(raw_data)
-        if 'date' in df.columns:
-            df['date'] = pd.to_datetime(df['date'], unit='s', errors='coerce')
-        
-        # 3. Aplicar HiLo com período dinâmico (usando dados históricos puros)
-        df_hilo = Indicators.calculate_hilo(df, period=self.hilo_period)
-        
-        # 4. Analisar último candle HISTÓRICO
-        last_candle = df_hilo.iloc[-1]
-        prev_candle = df_hilo.iloc[-2]
+        # 4. Último candle HISTÓRICO (resumo mantido no estado)
+        last_candle = {
+            'date': datetime.fromtimestamp(state.last_date) if state.last_date else None,
+            'close': state.last_close,
+            'sma_high': state.sma_high,
+            'sma_low': state.sma_low,
+            'hilo': state.hilo,
+            'trend': state.trend,
+        }
         
         # 5. Buscar COTAÇÃO ATUAL (tempo real) para comparação
-        current_quotes = self.brapi.get_quotes([ticker])
+        current_quotes = self._get_quotes([ticker])
         current_price = current_quotes.get(ticker)
         
         if not current_price:
@@ -73,10 +254,17 @@ class MarketScanner:
         print(f"   HiLo Ativo (Stop): R$ {hilo_value:.2f}")
         # ------------------------------
 
-        # Proximity Check (0.5%)
-        # Calculate absolute percentage distance to HiLo
+        # Buscar posições abertas deste ativo (da carteira pré-carregada, se houver)
+        if self._positions is not None:
+            open_positions = self._positions.get(ticker, [])
+        else:
+            open_positions = self.repository.get_open_positions_by_asset(ticker)
+
+        # Alertas de proximidade do HiLo (0.5%) e de meta de lucro das posições
+        alerts = self._check_alerts(ticker, current_price, hilo_value, open_positions)
+
         proximity_pct = abs(current_price - hilo_value) / current_price if current_price > 0 else 1.0
-        is_proximity_warning = proximity_pct < 0.005 # Menor que 0.5%
+        is_proximity_warning = any(alert['kind'] == 'proximity' for alert in alerts)
         
         warn_msg = "⚠️ ALERTA: Próximo da Reversão!" if is_proximity_warning else "OK (Distância segura)"
         print(f"   Distância do HiLo: {proximity_pct*100:.2f}% -> {warn_msg}")
@@ -119,8 +307,6 @@ class MarketScanner:
         # --- VERIFICAÇÃO DE GESTÃO (Sinal ou Monitoramento de Lucro) ---
         # Mesmo se não tiver sinal novo, podemos querer checar lucro.
         
-        # Buscar posições abertas deste ativo
-        open_positions = self.repository.get_open_positions_by_asset(ticker)
         exit_alert_msg = None
         exit_lines = []
 
@@ -135,24 +321,14 @@ class MarketScanner:
                     elif "BAIXA" in signal and pos_type_normalized == "CALL":
                         exit_lines.append(f"⚠️ SAÍDA IMEDIATA (Inversão): Call *{pos['ticker_option']}*")
 
-            # 2. Verificar Meta de Lucro (Profit Target)
-            # Buscar cotações atuais das opções em carteira
-            tickers_opts = [pos['ticker_option'] for pos in open_positions]
-            quotes = self.brapi.get_quotes(tickers_opts)
-            
-            for pos in open_positions:
-                tk_opt = pos['ticker_option']
-                curr_price = float(quotes.get(tk_opt, 0.0))
-                entry_price = float(pos['entry_price'])
-                
-                if curr_price > 0 and entry_price > 0:
-                    profit_pct = ((curr_price - entry_price) / entry_price) * 100
-                    
-                    # Se lucro maior que o target definido no JSON
-                    if profit_pct >= self.profit_target:
-                        emoji_rocket = "🚀"
-                        exit_lines.append(f"{emoji_rocket} META BATIDA ({profit_pct:.1f}%): *{tk_opt}* a R$ {curr_price:.2f}")
-                        print(f"\t💰 ALERTA LUCRO: {tk_opt} bateu {profit_pct:.1f}% (Meta: {self.profit_target}%)")
+            # 2. Verificar Meta de Lucro (Profit Target), já avaliada pelo motor de alertas
+            for alert in alerts:
+                if alert['kind'] != 'profit_target':
+                    continue
+                tk_opt, curr_price = alert['ticker'], alert['price']
+                profit_pct = ((curr_price - alert['entry_price']) / alert['entry_price']) * 100
+                exit_lines.append(f"🚀 META BATIDA ({profit_pct:.1f}%): *{tk_opt}* a R$ {curr_price:.2f}")
+                print(f"\t💰 ALERTA LUCRO: {tk_opt} bateu {profit_pct:.1f}% (Meta: {self.profit_target}%)")
 
             if exit_lines:
                 exit_alert_msg = "\n".join(exit_lines)
@@ -160,32 +336,140 @@ class MarketScanner:
         # Persistência e Notificação
         # Notificar se: (Tem Sinal Novo) OU (Forced) OU (Tem Alerta de Gestão/Lucro)
         if signal or exit_alert_msg:
+            def notify(signal_id=None, is_new=False):
+                if is_new or force_notification or (exit_alert_msg is not None):
+                    self._notify(ticker, signal, result.get('option'), exit_alert_msg)
+
             try:
                 # Salvar sinal apenas se existir (pode ser só um check de lucro sem sinal de hilo)
-                is_new = False
-                if signal:
-                    signal_id, is_new = self.repository.save_signal(result)
-                
-                should_notify = is_new or force_notification or (exit_alert_msg is not None)
-                
-                # Se for só alerta de gestão sem opção sugerida (ex: só lucro), montamos payload minimo
-                opt_payload = result.get('option')
-                if not opt_payload and exit_alert_msg:
-                    # Mock payload para não quebrar notification service
-                    opt_payload = {'ticker_option': 'GESTÃO', 'strike': 0, 'last_price': 0, 'days_to_expire': 0}
-
-                if should_notify and opt_payload:
-                    print("\t📲 Enviando notificação via WhatsApp...")
-                    # Se não tiver sinal (só gestão), manda "MONITORAMENTO" como título
-                    sig_title = signal if signal else "MONITORAMENTO DE CARTEIRA"
-                    
-                    self.notifier.send_signal_message(
-                        ticker, 
-                        sig_title, 
-                        opt_payload,
-                        exit_alert=exit_alert_msg
-                    )
+                if not signal:
+                    notify()
+                elif self.buffered:
+                    # Gravação em lote no fim do scan: o sinal é notificado após o flush (precisa do is_new),
+                    # mas o alerta de saída vai para a fila na hora, com prioridade (não espera a varredura)
+                    if exit_alert_msg:
+                        self.notifier.send_exit_message(ticker, exit_alert_msg)
+
+                    def notify_signal(signal_id=None, is_new=False):
+                        if is_new or force_notification:
+                            self._notify(ticker, signal, result.get('option'), None)
+
+                    self.repository.save_signal(result, on_saved=notify_signal)
+                else:
+                    notify(*self.repository.save_signal(result))
             except Exception as e:
                 print(f"\t❌ Erro ao salvar/notificar: {e}")
         
         return result
+
+    def _check_alerts(self, ticker: str, price: float, hilo: float, positions: list) -> list:
+        """
+        Avalia no AlertEngine a faixa de proximidade do HiLo do ativo e a meta de
+        lucro de cada posição, com as cotações do lote do scan.
+        Com preço anterior (scan(previous=...)) só dispara o que cruzou desde
+        então; sem ele, todo alerta cuja condição já é verdadeira.
+        Retorna os alertas disparados.
+        """
+        engine = AlertEngine()
+        low, high = HiLoState.proximity_band(hilo, self.PROXIMITY_PCT)
+        engine.add_proximity(ticker, low, high, trigger_price=hilo)
+        for pos in positions:
+            if float(pos.get('entry_price') or 0) > 0:
+                engine.add_profit_target(pos, self.profit_target, ticker_asset=ticker)
+
+        quotes = {ticker: price}
+        option_tickers = [pos['ticker_option'] for pos in positions]
+        if option_tickers:
+            quotes.update(self._get_quotes(option_tickers))
+        if self._previous:
+            engine.seed({tk: self._previous[tk] for tk in quotes if tk in self._previous})
+        return engine.evaluate(quotes)
+
+    def _notify(self, ticker, signal, option, exit_alert_msg):
+        """Envia o sinal (e/ou alerta de gestão) via WhatsApp."""
+        if not option:
+            # Sem opção sugerida (ex: só meta de lucro): alerta de gestão em mensagem própria
+            if exit_alert_msg:
+                print("\t📲 Enviando alerta de gestão via WhatsApp...")
+                self.notifier.send_exit_message(ticker, exit_alert_msg)
+            return
+
+        print("\t📲 Enviando notificação via WhatsApp...")
+        # Se não tiver sinal (só gestão), manda "MONITORAMENTO" como título
+        sig_title = signal if signal else "MONITORAMENTO DE CARTEIRA"
+        
+        self.notifier.send_signal_message(
+            ticker, 
+            sig_title, 
+            option,
+            exit_alert=exit_alert_msg
+        )
+
+    def _get_hilo_state(self, ticker: str):
+        """
+        Carrega o estado HiLo persistido do ativo e avança apenas com os candles novos.
+        Sem estado salvo (ou com período diferente / lacuna no histórico),
+        reconstrói a partir de 3 meses de candles.
+        """
+        if ticker in self._states:
+            return self._states[ticker]
+
+        state = self._advance_saved_state(ticker, self.repository.get_hilo_state(ticker))
+        if state:
+            self._states[ticker] = state
+            return state
+
+        # Cold start: histórico completo (SEM candle sintético para não distorcer HiLo)
+        raw_data = self.brapi.get_historical_data(ticker, range='3mo', interval='1d', include_today=False)
+        if not raw_data:
+            return None
+
+        state = HiLoState.from_candles(ticker, raw_data, period=self.hilo_period)
+        if state.is_ready:
+            self.repository.save_hilo_state(state.to_dict())
+            self._states[ticker] = state
+        return state
+
+    def _advance_saved_state(self, ticker: str, saved: dict):
+        """
+        Avança um estado salvo com os candles recentes. Retorna None se o estado
+        não servir (inexistente, período diferente ou lacuna no histórico).
+        """
+        state = HiLoState.from_dict(saved) if saved else None
+        recent_range = self._recent_range(state)
+        if not recent_range:
+            return None
+
+        recent = self.brapi.get_historical_data(ticker, range=recent_range, interval='1d', include_today=False)
+        usable, updated = self._apply_recent(state, recent)
+        if updated:
+            self.repository.save_hilo_state(state.to_dict())
+        return state if usable else None
+
+    def _recent_range(self, state):
+        """Range de candles recentes para avançar o estado (None = estado inutilizável)."""
+        if not state or state.period != self.hilo_period or not state.is_ready:
+            return None
+        return self._range_for_gap((dt_date.today() - state.last_day).days)
+
+    def _apply_recent(self, state, recent: list):
+        """
+        Aplica os candles recentes ao estado. Retorna (utilizável, mudou); quem chama grava se mudou.
+        Só confia no incremental se o trecho novo encosta no último candle processado.
+        """
+        if not recent or not any(candle_day(c['date']) == state.last_day for c in recent):
+            return False, False
+
+        changed = False
+        for candle in recent:
+            changed = state.update(candle) or changed
+        return True, changed
+
+    @staticmethod
+    def _range_for_gap(gap_days: int):
+        """Menor range da Brapi que cobre os dias sem atualização (None = reconstruir)."""
+        if gap_days <= 5:
+            return '5d'
+        if gap_days <= 28:
+            return '1mo'
+        return None
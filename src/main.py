@@ -7,8 +7,9 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from datetime import datetime
 from src.core.scanner import MarketScanner
+from src.core.intraday import IntradayChecker
 from src.services.supabase_client import get_supabase_client
-from src.services.supabase_client import get_supabase_client
+from src.services.http_client import get_http_client
 from src.services.notification_service import NotificationService
 from src.config import Config
 
@@ -44,16 +45,18 @@ def is_cron_active():
     # Padrão é True se não existir chave
     return cfg.get("cron_active", True)
 
-def run_market_scan(specific_tickers=None, is_manual_run=False):
+def run_market_scan(specific_tickers=None, is_manual_run=False, on_progress=None):
     """
     Função principal que orquestra a varredura.
     :param specific_tickers: Lista de tickers específicos para analisar (opcional)
     :param is_manual_run: Se True, ignora a trava do Cron (roda mesmo se estiver pausado)
+    :param on_progress: Callback (ticker, concluídos, total) chamado ao fim de cada ativo (opcional)
     """
     print("=== Trading Bot B3 - HiLo Scanner ===")
     
     # Instancia notificador para alertas de emergência
     notifier = NotificationService()
+    scanner = None
     
     try:
         try:
@@ -84,29 +87,45 @@ def run_market_scan(specific_tickers=None, is_manual_run=False):
         # 4. Instancia Scanner com Configuração de HiLo e Profit Target do Usuário
         hilo_p = int(user_conf.get("hilo_period", 10))
         prof_t = float(user_conf.get("profit_target", 50.0))
+        workers = int(user_conf.get("scan_concurrency", Config.SCAN_CONCURRENCY))
+        
+        # buffered: sinais gravados em lote no fim do scan (fora do caminho crítico de cada ativo)
+        scanner = MarketScanner(hilo_period=hilo_p, profit_target=prof_t, max_workers=workers, buffered=True)
+        # Digest: sinais + resumo da execução no menor número de mensagens (alertas de saída vão na hora)
+        if len(tickers) > 1:
+            scanner.notifier.start_digest()
         
-        scanner = MarketScanner(hilo_period=hilo_p, profit_target=prof_t)
+        # Pré-cálculo do HiLo de todo o universo (em lote); falhas caem no fluxo por ativo
+        try:
+            scanner.warm_up(tickers)
+        except Exception as e:
+            print(f"⚠️ Erro no pré-cálculo do HiLo: {e}")
         
-        # 5. Execução
-        daily_results = []
+        # 5. Execução (concorrente, com erros isolados por ativo e resultados na ordem da lista)
+        print(f"⚡ Executando com até {scanner.max_workers} ativos em paralelo...")
+        daily_results = scanner.scan(tickers, on_progress=on_progress)
+        
+        # Gatilhos de virada do próximo pregão (verificação intraday sem recalcular histórico)
+        try:
+            scanner.save_flip_triggers(tickers)
+        except Exception as e:
+            print(f"⚠️ Erro ao salvar gatilhos de virada: {e}")
         
-        for ticker in tickers:
-            print(f"🔄 Processando {ticker} (HiLo {hilo_p})...")
-            try:
-                result = scanner.analyze_asset(ticker)
-                if result:
-                    daily_results.append(result)
-            except Exception as e:
-                err_msg = f"Erro ao analisar {ticker}: {e}"
-                print(f"❌ {err_msg}")
-                # Opcional: Acumular erros individuais para alerta consolidado? 
-                # Por ora, apenas loga e segue o baile.
+        write_errors = scanner.write_errors
+        for err in write_errors:
+            print(f"💾❌ {err}")
                 
         # 6. Enviar Resumo Diário
         # Só envia se analisou mais de 1 ativo (evita spam em testes de ticket único)
         if daily_results and len(daily_results) > 1:
             print("📨 Enviando Boletim Diário Resumido...")
-            scanner.notifier.send_daily_summary(daily_results)
+            scanner.notifier.send_daily_summary(daily_results, write_errors=write_errors)
+        elif write_errors:
+            notifier.send_error_alert("Falha ao gravar sinais: " + "; ".join(write_errors))
+            
+        # Estatísticas de rede por host (latência, retries, erros)
+        for host, st in get_http_client().stats().items():
+            print(f"🌐 {host}: {st['requests']} req | {st['retries']} retries | {st['errors']} erros | {st['total_time']:.1f}s")
             
         print("=== Fim da Análise ===")
 
@@ -121,7 +140,54 @@ def run_market_scan(specific_tickers=None, is_manual_run=False):
         
         # Re-raise para que o GitHub Actions marque como Failed
         raise critical_e
+    
+    finally:
+        if scanner is not None:
+            scanner.notifier.flush_digest()
+        # Entrega as notificações enfileiradas antes de encerrar
+        # (o que não sair dentro do prazo continua na tabela notification_outbox e é
+        # entregue pela próxima execução)
+        notifier.drain()
+
+def run_intraday_check(specific_tickers=None):
+    """
+    Verificação intraday rápida: uma cotação em lote contra os gatilhos de virada
+    pré-calculados no fechamento. Só os ativos que viraram passam pela análise completa.
+    """
+    print("=== Trading Bot B3 - Verificação Intraday ===")
+    notifier = NotificationService()
+    
+    try:
+        Config.validate()
+        
+        user_conf = load_user_config()
+        if specific_tickers is None and not user_conf.get("cron_active", True):
+            print("⏸️ Scanner pausado pelo usuário. Encerrando.")
+            return None
+        
+        scanner = MarketScanner(
+            hilo_period=int(user_conf.get("hilo_period", 10)),
+            profit_target=float(user_conf.get("profit_target", 50.0)),
+            max_workers=int(user_conf.get("scan_concurrency", Config.SCAN_CONCURRENCY)),
+            buffered=True
+        )
+        return IntradayChecker(scanner).check(specific_tickers)
+    
+    except Exception as critical_e:
+        err_msg = f"FALHA NA VERIFICAÇÃO INTRADAY: {str(critical_e)}"
+        print(f"🔥 {err_msg}")
+        try:
+            notifier.send_error_alert(err_msg)
+        except:
+            print("❌ Falha crítica ao tentar enviar alerta de erro.")
+        raise critical_e
+    
+    finally:
+        notifier.drain()
 
 if __name__ == "__main__":
-    # Se rodar direto: python src/main.py
-    run_market_scan()
+    # Se rodar direto: python src/main.py  (ou --intraday para a verificação rápida)
+    if "--intraday" in sys.argv[1:]:
+        run_intraday_check()
+    else:
+        run_market_scan()
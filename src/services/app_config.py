@@ -0,0 +1,76 @@
+import threading
+import time
+from datetime import datetime
+from src.config import Config
+from src.services.supabase_client import get_supabase_client
+
+class AppConfigCache:
+    """
+    Cache em memória da tabela 'app_config' (chave/valor).
+
+    Todas as chaves são carregadas em uma única consulta e reutilizadas até
+    expirar o TTL; leituras dentro do prazo não vão ao banco. Escritas via
+    `set` gravam no banco e atualizam o cache na hora.
+    """
+
+    def __init__(self, ttl: float = None):
+        self.ttl = Config.APP_CONFIG_TTL if ttl is None else float(ttl)
+        self._values = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def all(self) -> dict:
+        """Todas as configurações ({key: value}), recarregando se o cache expirou."""
+        with self._lock:
+            if self._values is None or time.monotonic() - self._loaded_at > self.ttl:
+                self._load()
+            return dict(self._values)
+
+    def get(self, key: str, default=None):
+        return self.all().get(key, default)
+
+    def set(self, key: str, value) -> bool:
+        """Grava (upsert) a configuração no banco e no cache."""
+        try:
+            get_supabase_client().table("app_config").upsert({
+                "key": key,
+                "value": str(value),
+                "updated_at": datetime.now().isoformat()
+            }).execute()
+        except Exception as e:
+            print(f"⚠️ Erro ao salvar config '{key}': {e}")
+            return False
+
+        with self._lock:
+            if self._values is not None:
+                self._values[key] = str(value)
+        return True
+
+    def invalidate(self):
+        """Força recarregar do banco na próxima leitura."""
+        with self._lock:
+            self._values = None
+
+    def _load(self):
+        try:
+            response = get_supabase_client().table("app_config").select("key, value").execute()
+            self._values = {row['key']: row['value'] for row in response.data or []}
+        except Exception as e:
+            print(f"\t⚠️ Erro ao ler app_config: {e}")
+            # Mantém o último valor conhecido; tenta de novo só após o TTL
+            if self._values is None:
+                self._values = {}
+        self._loaded_at = time.monotonic()
+
+
+_app_config = None
+_app_config_lock = threading.Lock()
+
+def get_app_config() -> AppConfigCache:
+    """Instância única (por processo) do cache de app_config."""
+    global _app_config
+    if _app_config is None:
+        with _app_config_lock:
+            if _app_config is None:
+                _app_config = AppConfigCache()
+    return _app_config
@@ -1,13 +1,18 @@
-import requests
 from src.config import Config
+from src.services.http_client import get_http_client
+from src.services.quote_cache import get_quote_cache
 from src.services.opcoes_net import OpcoesNetClient
+from src.services.candle_store import get_candle_store
 
 class BrapiClient:
     BASE_URL = "https://brapi.dev/api"
 
     def __init__(self):
         self.token = Config.BRAPI_TOKEN
+        self.http = get_http_client() # Sessão keep-alive com timeout e retry
+        self.quote_cache = get_quote_cache() # Cotações recentes em memória (TTL curto)
         self.opcoes_net = OpcoesNetClient() # Cliente Scraping seguro
+        self.candle_store = get_candle_store() # Cache local de candles (um por processo)
         if not self.token:
             raise ValueError("Token da Brapi não configurado.")
 
@@ -28,7 +33,15 @@ class BrapiClient:
         Busca cotações atuais para uma lista de tickers.
         Ex: tickers=['PETR4', 'VALE3', 'PETRM400']
         Retorna: {'PETR4': 34.50, 'VALE3': 60.10}
+        Passa pelo cache de cotações: só os símbolos ausentes/expirados vão à Brapi,
+        todos juntos em uma requisição por lote.
         """
+        if not tickers:
+            return {}
+        return self.quote_cache.get(tickers, self._fetch_quotes)
+
+    def _fetch_quotes(self, tickers: list):
+        """Requisição direta à Brapi (sem cache) para um lote de tickers."""
         if not tickers:
             return {}
             
@@ -40,7 +53,7 @@ class BrapiClient:
         url = f"{self.BASE_URL}/quote/{tickers_str}"
         
         try:
-            response = requests.get(url, params=params)
+            response = self.http.get(url, params=params)
             response.raise_for_status()
             data = response.json()
             
@@ -63,7 +76,7 @@ class BrapiClient:
         try:
             url = f"{self.BASE_URL}/quote/{ticker}"
             params = {'token': self.token, 'fundamental': 'true'} # Fundamental pode vir no quote default as vezes
-            response = requests.get(url, params=params)
+            response = self.http.get(url, params=params)
             data = response.json()
             
             if 'results' in data and data['results']:
@@ -76,14 +89,147 @@ class BrapiClient:
             pass
         return {'longName': None, 'sector': None}
 
+    # Dias corridos cobertos por cada 'range' da Brapi (do menor para o maior)
+    RANGE_DAYS = [
+        ('1d', 1), ('5d', 5), ('1mo', 31), ('3mo', 92), ('6mo', 183),
+        ('1y', 366), ('2y', 731), ('5y', 1827), ('10y', 3653)
+    ]
+
     def get_historical_data(self, ticker: str, range: str = "3mo", interval: str = "1d", include_today: bool = True):
         """
         Busca dados históricos (candles) para um ticker.
+        Com o cache local ativo, baixa apenas os candles mais novos que o último
+        salvo em disco e devolve a janela pedida a partir do cache.
         Se include_today=True, adiciona um candle sintético com a cotação atual.
         """
         from datetime import datetime, date as dt_date
-        import time
         
+        fetch_range, start_ts, has_cache = self._plan_history(ticker, range, interval)
+        
+        result = None
+        try:
+            result = self._fetch_history(ticker, fetch_range, interval)
+        except Exception as e:
+            if not has_cache:
+                raise
+            print(f"\t⚠️ Falha ao atualizar {ticker} na Brapi ({e}). Usando candles salvos.")
+        
+        historical = self._finish_history(ticker, interval, start_ts, result, has_cache)
+        if historical is None:
+            print(f"⚠️ Sem dados para {ticker}")
+            return None
+
+        # Se quiser incluir dados de hoje
+        if include_today and historical and result:
+            last_candle_date = datetime.fromtimestamp(historical[-1]['date']).date()
+            today = dt_date.today()
+            
+            # Se o último candle não é de hoje, criar candle sintético
+            if last_candle_date < today:
+                # Buscar cotação atual (tempo real)
+                current_price = result.get('regularMarketPrice')
+                
+                if current_price and current_price > 0:
+                    # Criar candle sintético de hoje
+                    # Timestamp de hoje às 18h (fechamento aproximado)
+                    today_timestamp = int(datetime.combine(today, datetime.min.time()).timestamp())
+                    
+                    synthetic_candle = {
+                        'date': today_timestamp,
+                        'open': current_price,  # Aproximação
+                        'high': current_price,  # Aproximação
+                        'low': current_price,   # Aproximação  
+                        'close': current_price,
+                        'volume': 0,  # Não temos volume intraday
+                        'adjustedClose': current_price
+                    }
+                    
+                    historical.append(synthetic_candle)
+                    print(f"\t✅ Candle sintético de hoje criado para {ticker} (R$ {current_price:.2f})")
+                else:
+                    print(f"\t⚠️ Cotação atual não disponível para {ticker}")
+        
+        return historical
+
+    def get_historical_data_batch(self, tickers: list, range: str = "3mo", interval: str = "1d", chunk_size: int = None):
+        """
+        Busca candles de vários tickers com poucas requisições.
+        A Brapi aceita símbolos separados por vírgula em /quote/{a,b,c}; os tickers
+        são agrupados pelo range necessário (delta do cache local ou janela cheia)
+        e divididos em blocos de `chunk_size` (limite do plano, Config.BRAPI_BATCH_SIZE).
+        Retorna {ticker: candles}; tickers sem dados ficam de fora.
+        """
+        chunk_size = max(1, chunk_size or Config.BRAPI_BATCH_SIZE)
+        
+        plans = {}
+        groups = {}
+        for ticker in dict.fromkeys(tickers):
+            plans[ticker] = self._plan_history(ticker, range, interval)
+            groups.setdefault(plans[ticker][0], []).append(ticker)
+        
+        fetched = {}
+        for fetch_range, group in groups.items():
+            for chunk in _chunked(group, chunk_size):
+                try:
+                    fetched.update(self._fetch_history_batch(chunk, fetch_range, interval))
+                except Exception as e:
+                    print(f"\t⚠️ Erro ao buscar histórico em lote ({', '.join(chunk)}): {e}")
+        
+        out = {}
+        for ticker, (_, start_ts, has_cache) in plans.items():
+            historical = self._finish_history(ticker, interval, start_ts, fetched.get(ticker), has_cache)
+            if historical:
+                out[ticker] = historical
+            else:
+                print(f"⚠️ Sem dados para {ticker}")
+        return out
+
+    def _plan_history(self, ticker: str, range: str, interval: str):
+        """
+        Decide o que baixar para um ticker: (range a buscar, início da janela, tem cache).
+        Só baixa o delta se o cache cobre o início da janela pedida (folga de 1 semana).
+        """
+        store = self.candle_store
+        first_ts, last_ts = store.bounds(ticker, interval) if store else (None, None)
+        start_ts = self._range_start(range)
+        
+        covered = last_ts is not None and start_ts is not None and first_ts <= start_ts + 7 * 86400
+        fetch_range = self._delta_range(last_ts, range) if covered else range
+        return fetch_range, start_ts, last_ts is not None
+
+    def _finish_history(self, ticker: str, interval: str, start_ts, result, has_cache: bool):
+        """Sanitiza os candles baixados, grava no cache e devolve a janela pedida (ou None)."""
+        if result is None and not has_cache:
+            return None
+        
+        historical = result.get('historicalDataPrice', []) if result else []
+        self._sanitize_candles(ticker, historical)
+        
+        store = self.candle_store
+        if store:
+            if historical:
+                store.append(ticker, interval, historical)
+            historical = store.get(ticker, interval, since=start_ts) or historical
+        return historical
+
+    def _fetch_history_batch(self, tickers: list, range: str, interval: str):
+        """Baixa o histórico de vários tickers em uma requisição. Retorna {ticker: item de 'results'}."""
+        params = {
+            'token': self.token,
+            'range': range,
+            'interval': interval,
+            'fundamental': 'false',
+        }
+        url = f"{self.BASE_URL}/quote/{','.join(tickers)}"
+        
+        response = self.http.get(url, params=params)
+        response.raise_for_status()
+        data = response.json()
+        
+        return {item['symbol']: item for item in data.get('results') or [] if item.get('symbol')}
+
+    def _fetch_history(self, ticker: str, range: str, interval: str):
+        """Baixa o histórico da Brapi. Retorna o item de 'results' (ou None se vazio)."""
         params = {
             'token': self.token,
             'range': range,
@@ -92,18 +238,18 @@ class BrapiClient:
         }
         url = f"{self.BASE_URL}/quote/{ticker}"
         
-        response = requests.get(url, params=params)
+        response = self.http.get(url, params=params)
         response.raise_for_status()
         data = response.json()
         
         if 'results' not in data or not data['results']:
-            print(f"⚠️ Sem dados para {ticker}")
             return None
+        return data['results'][0]
+
+    def _sanitize_candles(self, ticker: str, historical: list):
+        """Sanitize data: Ensure High and Low are never 0"""
+        from datetime import datetime
 
-        result = data['results'][0]
-        historical = result.get('historicalDataPrice', [])
-        
-        # Sanitize data: Ensure High and Low are never 0
         for candle in historical:
             o = candle.get('open', 0)
             h = candle.get('high', 0)
@@ -132,34 +278,32 @@ class BrapiClient:
                     if candle['high'] < candle['low']:
                          candle['high'] = candle['low']
 
-        # Se quiser incluir dados de hoje
-        if include_today and historical:
-            last_candle_date = datetime.fromtimestamp(historical[-1]['date']).date()
-            today = dt_date.today()
-            
-            # Se o último candle não é de hoje, criar candle sintético
-            if last_candle_date < today:
-                # Buscar cotação atual (tempo real)
-                current_price = result.get('regularMarketPrice')
-                
-                if current_price and current_price > 0:
-                    # Criar candle sintético de hoje
-                    # Timestamp de hoje às 18h (fechamento aproximado)
-                    today_timestamp = int(datetime.combine(today, datetime.min.time()).timestamp())
-                    
-                    synthetic_candle = {
-                        'date': today_timestamp,
-                        'open': current_price,  # Aproximação
-                        'high': current_price,  # Aproximação
-                        'low': current_price,   # Aproximação  
-                        'close': current_price,
-                        'volume': 0,  # Não temos volume intraday
-                        'adjustedClose': current_price
-                    }
-                    
-                    historical.append(synthetic_candle)
-                    print(f"\t✅ Candle sintético de hoje criado para {ticker} (R$ {current_price:.2f})")
-                else:
-                    print(f"\t⚠️ Cotação atual não disponível para {ticker}")
-        
-        return historical
+    def _delta_range(self, last_ts: int, requested: str):
+        """Menor 'range' da Brapi que cobre do último candle salvo até hoje."""
+        from datetime import datetime, date as dt_date
+
+        gap = (dt_date.today() - datetime.fromtimestamp(last_ts).date()).days + 1
+        requested_days = dict(self.RANGE_DAYS).get(requested)
+        for name, days in self.RANGE_DAYS:
+            if requested_days is not None and days >= requested_days:
+                return requested
+            if days >= gap:
+                return name
+        return requested
+
+    def _range_start(self, range: str):
+        """Timestamp inicial da janela de um 'range' (None = todo o histórico salvo)."""
+        from datetime import datetime, timedelta
+
+        if range == 'ytd':
+            return int(datetime(datetime.now().year, 1, 1).timestamp())
+        days = dict(self.RANGE_DAYS).get(range)
+        if days is None:
+            return None
+        start = datetime.combine((datetime.now() - timedelta(days=days)).date(), datetime.min.time())
+        return int(start.timestamp())
+
+
+def _chunked(items: list, size: int):
+    """Divide a lista em blocos de até `size` itens."""
+    return [items[i:i + size] for i in range(0, len(items), size)]
@@ -0,0 +1,109 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from src.config import Config
+
+class CandleStore:
+    """
+    Armazenamento local (SQLite) de candles OHLC por ticker e intervalo.
+
+    Guarda o histórico já baixado da Brapi para que as próximas execuções
+    busquem apenas os candles novos (delta) e, sem rede, sirvam do disco.
+    """
+
+    # Colunas no formato do 'historicalDataPrice' da Brapi
+    FIELDS = ("open", "high", "low", "close", "volume", "adjustedClose")
+
+    def __init__(self, path: str):
+        self.path = path
+        folder = os.path.dirname(os.path.abspath(path))
+        os.makedirs(folder, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS candles (
+                    ticker TEXT NOT NULL,
+                    interval TEXT NOT NULL,
+                    date INTEGER NOT NULL,
+                    open REAL,
+                    high REAL,
+                    low REAL,
+                    close REAL,
+                    volume REAL,
+                    adjusted_close REAL,
+                    PRIMARY KEY (ticker, interval, date)
+                )
+            """)
+
+    def bounds(self, ticker: str, interval: str):
+        """(primeiro, último) timestamp (unix) salvos para o ticker, ou (None, None)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(date), MAX(date) FROM candles WHERE ticker = ? AND interval = ?",
+                (ticker, interval)
+            ).fetchone()
+        return (row[0], row[1]) if row else (None, None)
+
+    def append(self, ticker: str, interval: str, candles: list):
+        """
+        Grava candles novos. O trecho baixado substitui o que já existia a partir
+        do seu primeiro candle (ex: candle do dia que ainda estava em formação).
+        """
+        rows = [
+            (ticker, interval, int(c['date']), c.get('open'), c.get('high'), c.get('low'),
+             c.get('close'), c.get('volume'), c.get('adjustedClose'))
+            for c in candles if c.get('date') is not None
+        ]
+        if not rows:
+            return 0
+
+        first = min(r[2] for r in rows)
+        if interval.endswith('d'):
+            # Candles diários: o mesmo pregão pode vir com horário diferente
+            first = int(datetime.combine(datetime.fromtimestamp(first).date(), datetime.min.time()).timestamp())
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM candles WHERE ticker = ? AND interval = ? AND date >= ?",
+                (ticker, interval, first)
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO candles VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        return len(rows)
+
+    def get(self, ticker: str, interval: str, since: int = None):
+        """Candles salvos (ordem cronológica) no formato da Brapi."""
+        query = ("SELECT date, open, high, low, close, volume, adjusted_close "
+                 "FROM candles WHERE ticker = ? AND interval = ?")
+        params = [ticker, interval]
+        if since is not None:
+            query += " AND date >= ?"
+            params.append(int(since))
+        query += " ORDER BY date"
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [dict(zip(("date",) + self.FIELDS, row)) for row in rows]
+
+
+_candle_store = None
+_candle_store_lock = threading.Lock()
+
+def get_candle_store():
+    """
+    Instância única (por processo) do cache local de candles, compartilhada
+    por todos os BrapiClient, ou None se desativado (Config.CANDLE_STORE_PATH vazio).
+    """
+    global _candle_store
+    if not Config.CANDLE_STORE_PATH:
+        return None
+    if _candle_store is None:
+        with _candle_store_lock:
+            if _candle_store is None:
+                _candle_store = CandleStore(Config.CANDLE_STORE_PATH)
+    return _candle_store
@@ -0,0 +1,106 @@
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from src.config import Config
+
+class HttpClient:
+    """
+    Camada de transporte HTTP compartilhada pelos clientes de dados (Brapi, Opcoes.net).
+
+    - Uma sessão keep-alive (pool de conexões) por host.
+    - Timeouts de conexão e leitura padrão (configuráveis via Config).
+    - Retry com backoff exponencial em 429/5xx (respeita Retry-After).
+    - Estatísticas por host (requisições, erros, retries, tempo acumulado).
+    """
+
+    RETRY_STATUS = (429, 500, 502, 503, 504)
+
+    def __init__(self, connect_timeout: float = None, read_timeout: float = None,
+                 max_retries: int = None, backoff_factor: float = None, pool_size: int = None):
+        self.timeout = (
+            connect_timeout if connect_timeout is not None else Config.HTTP_CONNECT_TIMEOUT,
+            read_timeout if read_timeout is not None else Config.HTTP_READ_TIMEOUT,
+        )
+        self.max_retries = max_retries if max_retries is not None else Config.HTTP_MAX_RETRIES
+        self.backoff_factor = backoff_factor if backoff_factor is not None else Config.HTTP_BACKOFF
+        self.pool_size = pool_size if pool_size is not None else Config.HTTP_POOL_SIZE
+
+        self._sessions = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def get(self, url: str, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def request(self, method: str, url: str, **kwargs):
+        """Executa a requisição na sessão do host. Sem timeout explícito, usa o padrão."""
+        host = urlparse(url).netloc
+        session = self._get_session(host)
+        kwargs.setdefault("timeout", self.timeout)
+
+        started = time.perf_counter()
+        try:
+            response = session.request(method, url, **kwargs)
+        except Exception:
+            self._record(host, time.perf_counter() - started, status=None, retries=0, error=True)
+            raise
+
+        retries = getattr(getattr(response.raw, "retries", None), "history", ()) or ()
+        self._record(host, time.perf_counter() - started, status=response.status_code,
+                     retries=len(retries), error=response.status_code >= 400)
+        return response
+
+    def stats(self) -> dict:
+        """Cópia das estatísticas por host."""
+        with self._lock:
+            return {host: dict(values) for host, values in self._stats.items()}
+
+    def _get_session(self, host: str):
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                retry = Retry(
+                    total=self.max_retries,
+                    backoff_factor=self.backoff_factor,
+                    status_forcelist=self.RETRY_STATUS,
+                    respect_retry_after_header=True,
+                    raise_on_status=False,
+                )
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=retry)
+                session = requests.Session()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._sessions[host] = session
+            return session
+
+    def _record(self, host, elapsed, status, retries, error):
+        with self._lock:
+            st = self._stats.setdefault(host, {
+                "requests": 0, "errors": 0, "retries": 0, "total_time": 0.0, "last_status": None
+            })
+            st["requests"] += 1
+            st["errors"] += int(error)
+            st["retries"] += retries
+            st["total_time"] += elapsed
+            st["last_status"] = status
+
+
+_http_client = None
+_http_lock = threading.Lock()
+
+def get_http_client() -> HttpClient:
+    """Instância única (por processo) do transporte HTTP."""
+    global _http_client
+    if _http_client is None:
+        with _http_lock:
+            if _http_client is None:
+                _http_client = HttpClient()
+    return _http_client
@@ -0,0 +1,237 @@
+import threading
+import time
+from src.config import Config
+from src.services.supabase_client import get_supabase_client
+
+class NotificationOutbox:
+    """
+    Fila durável de mensagens de WhatsApp (tabela 'notification_outbox' no
+    banco configurado: Supabase ou SQLite local) com entrega em segundo plano.
+
+    `enqueue` grava a mensagem e retorna na hora; uma thread dedicada entrega
+    na ordem de chegada (urgentes, `priority` > 0, primeiro) respeitando um
+    intervalo mínimo entre envios (rate limit) e reagenda falhas com backoff
+    exponencial até `max_attempts`.
+    Como a fila fica no banco, o que não for entregue até o fim de uma execução
+    (ex: GitHub Actions) é entregue pela próxima. Cada mensagem é reservada
+    com um UPDATE condicional (status pending -> sending), então duas execuções
+    simultâneas nunca enviam a mesma mensagem.
+    Status: pending -> sending -> sent | failed.
+    """
+
+    TABLE = "notification_outbox"
+    STATUSES = ("pending", "sending", "sent", "failed")
+    CLAIM_TIMEOUT = 300.0  # s: reserva 'sending' mais antiga que isso é de um processo que morreu
+
+    def __init__(self, deliver, max_attempts: int = 5, backoff: float = 2.0, min_interval: float = 1.0):
+        """
+        :param deliver: função (number, text) -> (ok, error, retryable) que faz o envio real.
+        """
+        self.deliver = deliver
+        self.max_attempts = max(1, int(max_attempts))
+        self.backoff = float(backoff)
+        self.min_interval = float(min_interval)
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_send = 0.0
+
+    @property
+    def table(self):
+        return get_supabase_client().table(self.TABLE)
+
+    # --- Produtor ---
+
+    def enqueue(self, number: str, text: str, priority: int = 0) -> int:
+        """
+        Grava a mensagem na fila e acorda o worker. Retorna o id da mensagem.
+        :param priority: maior sai antes (ex: 1 = alerta de saída urgente).
+        """
+        now = time.time()
+        response = self.table.insert({
+            "number": str(number),
+            "text": text,
+            "priority": int(priority),
+            "status": "pending",
+            "attempts": 0,
+            "next_attempt": now,
+            "created_at": now
+        }).execute()
+        self.start()
+        self._wake.set()
+        return response.data[0]['id']
+
+    # --- Consulta ---
+
+    def status(self, message_id: int):
+        """Status de uma mensagem (dict) ou None."""
+        response = self.table\
+            .select("id, number, priority, status, attempts, last_error, created_at, sent_at")\
+            .eq("id", message_id)\
+            .execute()
+        return response.data[0] if response.data else None
+
+    def summary(self) -> dict:
+        """Quantidade de mensagens por status ({'sent': 10, 'pending': 1, ...})."""
+        counts = {}
+        for status in self.STATUSES:
+            response = self.table.select("id", count="exact").eq("status", status).limit(1).execute()
+            if response.count:
+                counts[status] = response.count
+        return counts
+
+    def recent(self, limit: int = 20, status: str = None) -> list:
+        """Últimas mensagens (mais recentes primeiro), opcionalmente filtradas por status."""
+        query = self.table.select("id, number, priority, status, attempts, last_error, created_at, sent_at, text")
+        if status:
+            query = query.eq("status", status)
+        rows = query.order("id", desc=True).limit(int(limit)).execute().data or []
+        for row in rows:
+            row['preview'] = (row.pop('text') or "")[:80]
+        return rows
+
+    # --- Worker ---
+
+    def start(self):
+        """Inicia a thread de entrega (idempotente)."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="notification-outbox", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def drain(self, timeout: float = 60.0) -> dict:
+        """
+        Espera a fila esvaziar (entregue ou falha definitiva) por até `timeout` segundos.
+        Mensagens com retry agendado para depois do prazo continuam na fila
+        (no banco) e são entregues pela próxima execução. Retorna o resumo por status.
+        """
+        self.start()
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            pending = self.table.select("id", count="exact")\
+                .in_("status", ["pending", "sending"])\
+                .lte("next_attempt", deadline)\
+                .limit(1)\
+                .execute().count
+            if not pending:
+                break
+            self._wake.set()
+            time.sleep(0.5)
+        return self.summary()
+
+    def _run(self):
+        self._release_stale()
+        while not self._stop.is_set():
+            self._wake.clear()
+            try:
+                row, next_due = self._claim_next()
+            except Exception as e:
+                print(f"\t⚠️ Outbox: erro ao ler a fila ({e}). Tentando de novo em 5s.")
+                self._stop.wait(5.0)
+                continue
+
+            if row is None:
+                wait = 30.0 if next_due is None else max(0.0, next_due - time.time())
+                self._wake.wait(timeout=min(wait, 30.0))
+                continue
+
+            # Rate limit: intervalo mínimo entre envios
+            wait = self._last_send + self.min_interval - time.time()
+            if wait > 0:
+                self._stop.wait(wait)
+            self._send(row)
+
+    def _release_stale(self):
+        """Envio interrompido (processo encerrado no meio): volta para a fila após CLAIM_TIMEOUT."""
+        try:
+            self.table.update({"status": "pending"})\
+                .eq("status", "sending")\
+                .lt("claimed_at", time.time() - self.CLAIM_TIMEOUT)\
+                .execute()
+        except Exception as e:
+            print(f"\t⚠️ Outbox: erro ao liberar envios interrompidos: {e}")
+
+    def _claim_next(self):
+        """
+        Reserva a próxima mensagem vencida (maior prioridade, depois a mais antiga).
+        Retorna (row, próximo vencimento).
+        A reserva só vale se o UPDATE ainda encontrar a linha como 'pending'
+        (outra execução pode ter reservado a mesma mensagem antes).
+        """
+        while True:
+            now = time.time()
+            due = self.table.select("*")\
+                .eq("status", "pending")\
+                .lte("next_attempt", now)\
+                .order("priority", desc=True)\
+                .order("id")\
+                .limit(1)\
+                .execute().data
+            if not due:
+                upcoming = self.table.select("next_attempt")\
+                    .eq("status", "pending")\
+                    .order("next_attempt")\
+                    .limit(1)\
+                    .execute().data
+                return None, (float(upcoming[0]['next_attempt']) if upcoming else None)
+
+            claimed = self.table.update({"status": "sending", "claimed_at": now})\
+                .eq("id", due[0]['id'])\
+                .eq("status", "pending")\
+                .execute().data
+            if claimed:
+                return claimed[0], None
+
+    def _send(self, row):
+        try:
+            ok, error, retryable = self.deliver(row['number'], row['text'])
+        except Exception as e:
+            ok, error, retryable = False, str(e), True
+        self._last_send = time.time()
+
+        attempts = int(row['attempts'] or 0) + 1
+        if ok:
+            values = {"status": "sent", "attempts": attempts, "sent_at": self._last_send, "last_error": None}
+        elif retryable and attempts < self.max_attempts:
+            next_attempt = self._last_send + self.backoff * (2 ** (attempts - 1))
+            values = {"status": "pending", "attempts": attempts, "next_attempt": next_attempt, "last_error": error}
+        else:
+            values = {"status": "failed", "attempts": attempts, "last_error": error}
+
+        try:
+            self.table.update(values).eq("id", row['id']).execute()
+        except Exception as e:
+            # A reserva expira (CLAIM_TIMEOUT) e a mensagem volta para a fila
+            print(f"\t⚠️ Outbox: erro ao atualizar a mensagem #{row['id']}: {e}")
+
+
+_outbox = None
+_outbox_lock = threading.Lock()
+
+def get_notification_outbox(deliver):
+    """
+    Instância única (por processo) da fila de notificações, ou None se
+    desativada (Config.NOTIFY_OUTBOX = false).
+    """
+    global _outbox
+    if not Config.NOTIFY_OUTBOX:
+        return None
+    if _outbox is None:
+        with _outbox_lock:
+            if _outbox is None:
+                _outbox = NotificationOutbox(
+                    deliver,
+                    max_attempts=Config.NOTIFY_MAX_ATTEMPTS,
+                    backoff=Config.NOTIFY_RETRY_BACKOFF,
+                    min_interval=Config.NOTIFY_MIN_INTERVAL
+                )
+    return _outbox
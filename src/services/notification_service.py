@@ -1,12 +1,18 @@
 import requests
 import json
 import os
-from datetime import date
+import threading
+from datetime import date, datetime
 
-from src.services.supabase_client import get_supabase_client
+from src.config import Config
+from src.services.app_config import get_app_config
+from src.services.notification_outbox import get_notification_outbox
 
 class NotificationService:
-    def __init__(self):
+    # Separador entre blocos de um digest (sinais, alertas e resumo na mesma mensagem)
+    DIGEST_SEPARATOR = "\n\n➖➖➖➖➖➖➖➖\n\n"
+
+    def __init__(self, digest: bool = False):
         # Carregar configurações do Ambiente (Prioridade) ou Fallback para código
         base_url = os.getenv("EVOLUTION_API_URL", "https://fr-evolution.cloudfy.cloud")
         instance = os.getenv("EVOLUTION_INSTANCE", "whats-pessoal-luan")
@@ -16,25 +22,24 @@ class NotificationService:
         base_url = base_url.rstrip("/")
         self.api_url = f"{base_url}/message/sendText/{instance}"
         
-        # Conectar ao banco para pegar configuração dinâmica
-        self.supabase = get_supabase_client()
-        self.target_number = self._get_target_number()
-
-    def _get_target_number(self):
-        """Busca o número de telefone salvo nas configurações do App."""
-        try:
-            resp = self.supabase.table("app_config").select("value").eq("key", "whatsapp_number").execute()
-            if resp.data:
-                return resp.data[0]['value']
-        except Exception as e:
-            print(f"\t⚠️ Erro ao ler config de telefone: {e}")
+        # Fila durável com entrega em segundo plano (None = envio síncrono)
+        self.outbox = get_notification_outbox(self._deliver)
         
-        return "5562981867784" # Fallback
+        # Modo digest: sinais e resumo da execução são acumulados e enviados juntos em flush_digest()
+        self.digest = digest
+        self._digest_blocks = []
+        self._digest_lock = threading.Lock()
+
+    @property
+    def target_number(self):
+        """Número de telefone salvo nas configurações do App (via cache de app_config)."""
+        return get_app_config().get("whatsapp_number") or "5562981867784" # Fallback
 
     def send_signal_message(self, ticker, signal_type, option_data, exit_alert=None):
         """
         Formata e envia a mensagem do sinal via WhatsApp.
         :param exit_alert: Texto opcional com instrução de saída (gestão de carteira).
+        No modo digest o sinal entra no digest; alertas de saída são enviados na hora.
         """
         emoji = "🚀" if "ALTA" in signal_type else "🔻"
         direction = "COMPRA (CALL)" if "ALTA" in signal_type else "VENDA (PUT)"
@@ -62,7 +67,44 @@ class NotificationService:
             f"_Verifique o gráfico antes de operar._"
         )
         
-        return self._send_whatsapp(message_text)
+        if self.digest and not exit_alert:
+            return self._add_to_digest(message_text)
+        return self._send_whatsapp(message_text, urgent=bool(exit_alert))
+
+    def send_exit_message(self, ticker, exit_alert):
+        """
+        Envia só o alerta de gestão de carteira (saída por inversão / meta de lucro).
+        Urgente: fora do digest e com prioridade na fila (sai antes das demais mensagens).
+        """
+        msg_date = datetime.now().strftime('%d/%m/%Y %H:%M')
+        text = (
+            f"🚨 *ATENÇÃO: GESTÃO DE CARTEIRA ({ticker})*\n"
+            f"📅 {msg_date}\n\n"
+            f"{exit_alert}"
+        )
+        return self._send_whatsapp(text, urgent=True)
+
+    def send_proximity_alert(self, alerts):
+        """
+        Envia numa única mensagem os ativos que entraram na faixa de proximidade
+        do HiLo (possível reversão) na verificação intraday.
+        :param alerts: Lista de (ticker, preço, preço de virada).
+        """
+        if not alerts:
+            return False
+
+        lines = [
+            "⚠️ *PRÓXIMOS DA REVERSÃO (HiLo)*",
+            f"📅 {datetime.now().strftime('%d/%m/%Y %H:%M')}\n"
+        ]
+        for ticker, price, trigger_price in sorted(alerts):
+            distance = abs(price - trigger_price) / price * 100
+            lines.append(f"*{ticker}*: R$ {price:.2f} (virada em R$ {trigger_price:.2f}, {distance:.2f}%)")
+
+        text = "\n".join(lines)
+        if self.digest:
+            return self._add_to_digest(text)
+        return self._send_whatsapp(text)
 
     def send_error_alert(self, error_msg):
         """
@@ -77,10 +119,11 @@ class NotificationService:
         )
         return self._send_whatsapp(text)
 
-    def send_daily_summary(self, results):
+    def send_daily_summary(self, results, write_errors=None):
         """
         Envia um relatório resumido com o status de TODOS os ativos analisados.
         :param results: Lista de dicts com o resultado de cada ativo.
+        :param write_errors: Falhas de gravação no banco durante a execução (opcional).
         """
         if not results:
             return False
@@ -119,35 +162,131 @@ class NotificationService:
             
         lines.append(f"\n_Total monitorados: {len(results)}_")
         
+        if write_errors:
+            lines.append("\n💾 *FALHAS DE GRAVAÇÃO*")
+            lines.extend(f"❌ {err}" for err in write_errors)
+        
         full_text = "\n".join(lines)
+        if self.digest:
+            return self._add_to_digest(full_text)
         return self._send_whatsapp(full_text)
 
-    def _send_whatsapp(self, text):
+    def start_digest(self):
+        """Passa a acumular sinais e resumo até flush_digest()."""
+        self.digest = True
+
+    def flush_digest(self):
+        """
+        Envia o digest acumulado no menor número de mensagens que caibam em
+        Config.WHATSAPP_MAX_CHARS. Retorna a quantidade de mensagens enviadas.
+        """
+        with self._digest_lock:
+            blocks, self._digest_blocks = self._digest_blocks, []
+        if not blocks:
+            return 0
+        
+        messages = self._pack_digest(blocks, Config.WHATSAPP_MAX_CHARS)
+        print(f"\t🗞️ Digest: {len(blocks)} bloco(s) em {len(messages)} mensagem(ns)")
+        for i, text in enumerate(messages, start=1):
+            if len(messages) > 1:
+                text = f"_({i}/{len(messages)})_\n{text}"
+            self._send_whatsapp(text)
+        return len(messages)
+
+    def _add_to_digest(self, text):
+        with self._digest_lock:
+            self._digest_blocks.append(text)
+        return True
+
+    @classmethod
+    def _pack_digest(cls, blocks, max_chars):
+        """
+        Agrupa blocos em mensagens de até `max_chars` (reservando espaço para o
+        contador "(i/n)"). Blocos maiores que o limite são quebrados por linha.
+        """
+        limit = max(200, int(max_chars) - 16)
+        pieces = []
+        for block in blocks:
+            if len(block) <= limit:
+                pieces.append(block)
+                continue
+            chunk = ""
+            for line in block.split("\n"):
+                while len(line) > limit:
+                    if chunk:
+                        pieces.append(chunk)
+                        chunk = ""
+                    pieces.append(line[:limit])
+                    line = line[limit:]
+                if chunk and len(chunk) + 1 + len(line) > limit:
+                    pieces.append(chunk)
+                    chunk = line
+                else:
+                    chunk = f"{chunk}\n{line}" if chunk else line
+            if chunk:
+                pieces.append(chunk)
+        
+        messages = []
+        for piece in pieces:
+            if messages and len(messages[-1]) + len(cls.DIGEST_SEPARATOR) + len(piece) <= limit:
+                messages[-1] += cls.DIGEST_SEPARATOR + piece
+            else:
+                messages.append(piece)
+        return messages
+
+    def _send_whatsapp(self, text, urgent=False):
+        """
+        Enfileira a mensagem no outbox (entrega assíncrona com retry).
+        urgent=True: prioridade na fila (entregue antes das mensagens comuns).
+        Sem outbox configurado, envia na hora. Retorna True se aceita/enviada.
+        """
+        if self.outbox is None:
+            ok, _, _ = self._deliver(self.target_number, text)
+            return ok
+        
+        message_id = self.outbox.enqueue(self.target_number, text, priority=1 if urgent else 0)
+        label = "urgente " if urgent else ""
+        print(f"\t📥 WhatsApp {label}#{message_id} enfileirado para {self.target_number}")
+        return True
+
+    def drain(self, timeout=None):
+        """Aguarda a entrega das mensagens enfileiradas. Retorna o resumo por status."""
+        if self.outbox is None:
+            return {}
+        summary = self.outbox.drain(Config.NOTIFY_DRAIN_TIMEOUT if timeout is None else timeout)
+        print(f"📬 Outbox WhatsApp: {summary}")
+        return summary
+
+    def _deliver(self, number, text):
+        """Envio real via Evolution API. Retorna (ok, erro, pode_repetir)."""
         headers = {
             "apikey": self.api_key,
             "Content-Type": "application/json"
         }
         
         payload = {
-            "number": self.target_number,
+            "number": number,
             "text": text
         }
         
         try:
-            print(f"\t📨 Enviando WhatsApp para {self.target_number}...")
+            print(f"\t📨 Enviando WhatsApp para {number}...")
             response = requests.post(self.api_url, headers=headers, json=payload, timeout=10)
             
             if response.status_code in [200, 201]:
                 print("\t✅ Mensagem enviada com sucesso!")
-                return True
+                return True, None, False
             else:
                 print(f"\t❌ Erro Evolution API: {response.status_code} - {response.text}")
-                return False
+                # 4xx (exceto timeout / rate limit) não adianta repetir
+                retryable = response.status_code >= 500 or response.status_code in (408, 429)
+                return False, f"HTTP {response.status_code}: {response.text[:200]}", retryable
                 
         except Exception as e:
             print(f"\t❌ Falha na conexão com WhatsApp: {e}")
-            return False
+            return False, str(e), True
 
 if __name__ == "__main__":
     svc = NotificationService()
     svc._send_whatsapp("🤖 Teste de conexão: Trading Bot Ativo!")
+    svc.drain()
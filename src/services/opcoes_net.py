@@ -1,6 +1,6 @@
 from datetime import datetime, timedelta
-import requests
 import pandas as pd
+from src.services.http_client import get_http_client
 
 class OpcoesNetClient:
     """
@@ -12,6 +12,9 @@ class OpcoesNetClient:
     """
     
     BASE_URL = "https://opcoes.net.br/listaopcoes/completa"
+
+    def __init__(self):
+        self.http = get_http_client() # Sessão keep-alive com timeout e retry
     
     def get_options_chain(self, ticker: str):
         print(f"\t🔌 Conectando Opcoes.net.br para {ticker}...")
@@ -47,7 +50,7 @@ class OpcoesNetClient:
         }
         
         try:
-            r = requests.get(self.BASE_URL, params=params, headers=headers, timeout=10)
+            r = self.http.get(self.BASE_URL, params=params, headers=headers)
             data = r.json()
             
             # O site retorna os vencimentos dentro de 'data' -> 'vencimentos'
@@ -118,7 +121,7 @@ class OpcoesNetClient:
         headers = { "User-Agent": "Mozilla/5.0...", "X-Requested-With": "XMLHttpRequest" }
         
         try:
-            r = requests.get(self.BASE_URL, params=params, headers=headers)
+            r = self.http.get(self.BASE_URL, params=params, headers=headers)
             data = r.json()
             raw_list = data.get('data', {}).get('cotacoesOpcoes', [])
             
@@ -0,0 +1,88 @@
+import threading
+import time
+
+from src.config import Config
+
+class QuoteCache:
+    """
+    Cache de cotações (por processo) na frente de BrapiClient.get_quotes.
+
+    - TTL curto: cotações recentes são servidas da memória.
+    - Lote: todos os símbolos que faltam vão em uma única requisição
+      (separados por vírgula), dividida em blocos de `batch_size`.
+    - Coalescência: se outra thread já está buscando um símbolo, espera
+      o resultado dela em vez de disparar outra requisição.
+    """
+
+    def __init__(self, ttl: float = None, batch_size: int = None, wait_timeout: float = 30.0):
+        self.ttl = ttl if ttl is not None else Config.QUOTE_CACHE_TTL
+        self.batch_size = max(1, batch_size or Config.BRAPI_BATCH_SIZE)
+        self.wait_timeout = wait_timeout
+        self._data = {}       # símbolo -> (preço, instante)
+        self._inflight = {}   # símbolo -> threading.Event
+        self._lock = threading.Lock()
+
+    def get(self, symbols: list, fetch) -> dict:
+        """
+        Retorna {símbolo: preço} para os símbolos pedidos.
+        `fetch(lista) -> dict` é chamado apenas para os que não estão no cache.
+        """
+        wanted = list(dict.fromkeys(s for s in symbols if s))
+        result, to_fetch, waiting = {}, [], []
+
+        with self._lock:
+            now = time.monotonic()
+            for sym in wanted:
+                cached = self._data.get(sym)
+                if cached and now - cached[1] < self.ttl:
+                    result[sym] = cached[0]
+                elif sym in self._inflight:
+                    waiting.append((sym, self._inflight[sym]))
+                else:
+                    self._inflight[sym] = threading.Event()
+                    to_fetch.append(sym)
+
+        if to_fetch:
+            fetched = {}
+            try:
+                for i in range(0, len(to_fetch), self.batch_size):
+                    fetched.update(fetch(to_fetch[i:i + self.batch_size]) or {})
+            finally:
+                with self._lock:
+                    now = time.monotonic()
+                    for sym in to_fetch:
+                        if sym in fetched:
+                            self._data[sym] = (fetched[sym], now)
+                        self._inflight.pop(sym).set()
+            result.update({sym: fetched[sym] for sym in to_fetch if sym in fetched})
+
+        for sym, event in waiting:
+            event.wait(self.wait_timeout)
+            with self._lock:
+                cached = self._data.get(sym)
+            if cached:
+                result[sym] = cached[0]
+
+        return result
+
+    def invalidate(self, symbols: list = None):
+        """Remove símbolos do cache (todos, se None)."""
+        with self._lock:
+            if symbols is None:
+                self._data.clear()
+            else:
+                for sym in symbols:
+                    self._data.pop(sym, None)
+
+
+_quote_cache = None
+_quote_lock = threading.Lock()
+
+def get_quote_cache() -> QuoteCache:
+    """Instância única (por processo) do cache de cotações."""
+    global _quote_cache
+    if _quote_cache is None:
+        with _quote_lock:
+            if _quote_cache is None:
+                _quote_cache = QuoteCache()
+    return _quote_cache
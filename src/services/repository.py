@@ -1,76 +1,123 @@
-from datetime import date
+import atexit
+import threading
+import weakref
+from datetime import date, datetime
+from src.config import Config
 from src.services.supabase_client import get_supabase_client
 
 class Repository:
-    def __init__(self):
-        self.supabase = get_supabase_client()
+    @property
+    def supabase(self):
+        # Cliente compartilhado do processo, conectado apenas no primeiro acesso
+        return get_supabase_client()
 
     def save_signal(self, analysis_result: dict):
         """
         Salva o sinal de virada e a oportunidade na base de dados.
-        Verifica duplicidade para não salvar o mesmo sinal repetido no dia.
+        Idempotente: um sinal por (ticker, signal_date) garantido pela constraint única.
+        Retorna (signal_id, is_new).
         """
         if not analysis_result.get('signal'):
             return None, False
 
-        ticker = analysis_result['ticker']
+        saved = self.save_signals([analysis_result])
+        return saved.get(analysis_result['ticker'], (None, False))
+
+    def save_signals(self, analysis_results: list):
+        """
+        Grava em lote os sinais de uma execução e suas oportunidades de opção.
+
+        1. Upsert em 'signals' com ON CONFLICT (ticker, signal_date) DO NOTHING:
+           a resposta traz apenas as linhas realmente criadas (sem corrida entre execuções).
+        2. Upsert em 'option_opportunities' (uma por sinal) só para os sinais novos.
+
+        Retorna {ticker: (signal_id, is_new)}; sinais já existentes vêm como (None, False).
+        """
         # CORREÇÃO: Usar a data de HOJE (execução) e não a data do último candle
         signal_date = date.today().strftime('%Y-%m-%d')
-        direction = "BUY" if "ALTA" in analysis_result['signal'] else "SELL"
-        
-        print(f"\t💾 Verificando duplicidade para {ticker} em {signal_date}...")
-
-        # 1. Verificar se já existe sinal para este ticker nesta data
-        existing = self.supabase.table("signals")\
-            .select("id")\
-            .eq("ticker", ticker)\
-            .eq("signal_date", signal_date)\
+
+        by_ticker = {}
+        for result in analysis_results:
+            if result.get('signal'):
+                by_ticker[result['ticker']] = result
+        if not by_ticker:
+            return {}
+
+        signal_rows = [
+            {
+                "ticker": ticker,
+                "signal_date": signal_date,
+                "direction": "BUY" if "ALTA" in result['signal'] else "SELL",
+                "price_at_signal": float(result['close']),
+                "hilo_value": float(result['hilo']),
+                "processed": True
+            }
+            for ticker, result in by_ticker.items()
+        ]
+
+        print(f"\t💾 Gravando {len(signal_rows)} sinal(is) de {signal_date}...")
+        response = self.supabase.table("signals")\
+            .upsert(signal_rows, on_conflict="ticker,signal_date", ignore_duplicates=True)\
             .execute()
-            
-        if existing.data:
-            print(f"\t⚠️ Sinal já registrado para {ticker} hoje.")
-            # Retorna ID e Flag indicando que NÃO É NOVO (False)
-            return existing.data[0]['id'], False
-
-        # 2. Inserir Sinal
-        signal_payload = {
-            "ticker": ticker,
-            "signal_date": signal_date,
-            "direction": direction,
-            "price_at_signal": float(analysis_result['close']),
-            "hilo_value": float(analysis_result['hilo']),
-            "processed": True
-        }
-        
-        response = self.supabase.table("signals").insert(signal_payload).execute()
-        
-        if not response.data:
-            print(f"\t❌ Erro ao salvar sinal de {ticker}")
-            return None
-            
-        signal_id = response.data[0]['id']
-        print(f"\t✅ Sinal salvo com ID: {signal_id}")
-        
-        # 3. Inserir Oportunidade de Opção (se houver)
-        if analysis_result.get('option'):
-            opt = analysis_result['option']
-            
-            option_payload = {
+
+        created = {row['ticker']: row['id'] for row in response.data or []}
+        saved = {ticker: (created.get(ticker), ticker in created) for ticker in by_ticker}
+
+        for ticker in by_ticker:
+            if ticker in created:
+                print(f"\t✅ Sinal de {ticker} salvo com ID: {created[ticker]}")
+            else:
+                print(f"\t⚠️ Sinal já registrado para {ticker} hoje.")
+
+        # Oportunidades de Opção (apenas dos sinais novos)
+        option_rows = []
+        for ticker, signal_id in created.items():
+            opt = by_ticker[ticker].get('option')
+            if not opt:
+                continue
+
+            close = float(by_ticker[ticker]['close'])
+            strike = float(opt['strike'])
+            distance = opt.get('distance', ((strike - close) / close * 100) if close else 0.0)
+
+            option_rows.append({
                 "signal_id": signal_id,
                 "ticker_asset": ticker,
                 "ticker_option": opt['ticker'],
                 "option_type": opt['type'],
-                "strike": float(opt['strike']),
+                "strike": strike,
                 "expiration_date": opt['expiration'],
                 "premium_at_signal": float(opt.get('last_price', 0.0)), # Preço capturado da Opcoes.net
-                "distance_to_strike": float(opt['distance']),
+                "distance_to_strike": float(distance),
                 "days_to_expire": int(opt['dte'])
-            }
-            
-            self.supabase.table("option_opportunities").insert(option_payload).execute()
-            print(f"\t✅ Oportunidade de Opção ({opt['ticker']}) salva com sucesso!")
-            
-        return signal_id, True
+            })
+
+        if option_rows:
+            self.supabase.table("option_opportunities")\
+                .upsert(option_rows, on_conflict="signal_id", ignore_duplicates=True)\
+                .execute()
+            print(f"\t✅ {len(option_rows)} oportunidade(s) de opção salva(s) com sucesso!")
+
+        return saved
+
+    def get_open_positions(self):
+        """
+        Busca TODAS as posições abertas do portfolio em uma única consulta,
+        indexadas por ativo base: {'PETR4': [pos, ...]}. Retorna None em caso de erro.
+        """
+        try:
+            response = self.supabase.table("portfolio")\
+                .select("*")\
+                .eq("status", "Aberta")\
+                .execute()
+        except Exception as e:
+            print(f"⚠️ Erro ao buscar portfolio: {e}")
+            return None
+
+        by_asset = {}
+        for pos in response.data or []:
+            by_asset.setdefault(pos['ticker_asset'], []).append(pos)
+        return by_asset
 
     def get_open_positions_by_asset(self, ticker_asset: str):
         """Busca posições abertas no portfolio para um ativo específico (ex: PETR4)"""
@@ -84,3 +131,185 @@ class Repository:
         except Exception as e:
             print(f"⚠️ Erro ao buscar portfolio para {ticker_asset}: {e}")
             return []
+
+    def get_hilo_state(self, ticker: str):
+        """Busca o estado incremental do HiLo salvo para o ativo (ou None)."""
+        try:
+            response = self.supabase.table("hilo_state")\
+                .select("state")\
+                .eq("ticker", ticker)\
+                .execute()
+            if response.data:
+                return response.data[0]['state']
+        except Exception as e:
+            print(f"⚠️ Erro ao buscar estado HiLo de {ticker}: {e}")
+        return None
+
+    def get_hilo_states(self, tickers: list):
+        """Busca em uma única consulta os estados HiLo salvos ({ticker: state})."""
+        if not tickers:
+            return {}
+        try:
+            response = self.supabase.table("hilo_state")\
+                .select("ticker, state")\
+                .in_("ticker", list(tickers))\
+                .execute()
+            return {row['ticker']: row['state'] for row in response.data or []}
+        except Exception as e:
+            print(f"⚠️ Erro ao buscar estados HiLo: {e}")
+            return {}
+
+    def save_hilo_state(self, state: dict):
+        """Grava (upsert) o estado incremental do HiLo do ativo."""
+        return self.save_hilo_states([state])
+
+    def save_hilo_states(self, states: list):
+        """Grava (upsert em lote, uma requisição) os estados incrementais do HiLo."""
+        if not states:
+            return True
+        now = datetime.now().isoformat()
+        try:
+            self.supabase.table("hilo_state").upsert([
+                {
+                    "ticker": state['ticker'],
+                    "period": state['period'],
+                    "state": state,
+                    "updated_at": now
+                }
+                for state in states
+            ]).execute()
+            return True
+        except Exception as e:
+            tickers = ", ".join(str(state.get('ticker')) for state in states)
+            print(f"⚠️ Erro ao salvar estado HiLo de {tickers}: {e}")
+            return False
+
+    def save_flip_triggers(self, triggers: list):
+        """Grava (upsert em lote) os preços de virada do HiLo calculados no fechamento."""
+        if not triggers:
+            return True
+        now = datetime.now().isoformat()
+        try:
+            self.supabase.table("flip_triggers")\
+                .upsert([{**trigger, "updated_at": now} for trigger in triggers], on_conflict="ticker")\
+                .execute()
+            return True
+        except Exception as e:
+            print(f"⚠️ Erro ao salvar gatilhos de virada: {e}")
+            return False
+
+    def get_flip_triggers(self, tickers: list = None):
+        """Busca os gatilhos de virada ({ticker: trigger}) em uma única consulta."""
+        try:
+            query = self.supabase.table("flip_triggers").select("*")
+            if tickers:
+                query = query.in_("ticker", list(tickers))
+            response = query.execute()
+            return {row['ticker']: row for row in response.data or []}
+        except Exception as e:
+            print(f"⚠️ Erro ao buscar gatilhos de virada: {e}")
+            return {}
+
+    def get_intraday_prices(self, tickers: list = None):
+        """Últimos preços avaliados hoje pelo verificador intraday ({ticker: preço})."""
+        try:
+            query = self.supabase.table("intraday_prices")\
+                .select("ticker, price")\
+                .eq("quote_date", date.today().isoformat())
+            if tickers:
+                query = query.in_("ticker", list(tickers))
+            response = query.execute()
+            return {row['ticker']: float(row['price']) for row in response.data or []}
+        except Exception as e:
+            print(f"⚠️ Erro ao buscar preços intraday: {e}")
+            return {}
+
+    def save_intraday_prices(self, prices: dict):
+        """Grava (upsert em lote) os preços avaliados nesta execução intraday."""
+        if not prices:
+            return True
+        today, now = date.today().isoformat(), datetime.now().isoformat()
+        try:
+            self.supabase.table("intraday_prices")\
+                .upsert([
+                    {"ticker": ticker, "price": float(price), "quote_date": today, "updated_at": now}
+                    for ticker, price in prices.items()
+                ], on_conflict="ticker")\
+                .execute()
+            return True
+        except Exception as e:
+            print(f"⚠️ Erro ao salvar preços intraday: {e}")
+            return False
+
+
+class BufferedRepository(Repository):
+    """
+    Repository com escrita adiada (write-behind) para o scan.
+
+    Os sinais (e suas oportunidades de opção) ficam numa fila em memória e são
+    gravados em lote por `flush()`: ao fim do scan, ao atingir `flush_size`
+    ou na saída do processo (atexit). Cada sinal pode levar um callback
+    `on_saved(signal_id, is_new)`, chamado após a gravação (ex: notificação).
+    Falhas de gravação ficam em `errors` para o resumo da execução.
+    """
+
+    def __init__(self, flush_size: int = None):
+        super().__init__()
+        self.flush_size = max(1, int(flush_size or Config.REPOSITORY_FLUSH_SIZE))
+        self.errors = []
+        self._pending = []  # [(analysis_result, on_saved)]
+        self._lock = threading.Lock()
+        _live_buffers.add(self)
+
+    def save_signal(self, analysis_result: dict, on_saved=None):
+        """
+        Enfileira o sinal para gravação em lote.
+        Retorna (None, None): id e novidade só são conhecidos após o flush.
+        """
+        if not analysis_result.get('signal'):
+            return None, False
+
+        with self._lock:
+            self._pending.append((analysis_result, on_saved))
+            full = len(self._pending) >= self.flush_size
+        if full:
+            self.flush()
+        return None, None
+
+    def flush(self):
+        """
+        Grava todos os sinais pendentes em um único lote e dispara os callbacks.
+        Retorna {ticker: (signal_id, is_new)} do lote gravado.
+        """
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if not batch:
+            return {}
+
+        try:
+            saved = self.save_signals([result for result, _ in batch])
+        except Exception as e:
+            tickers = ", ".join(result['ticker'] for result, _ in batch)
+            self.errors.append(f"Falha ao gravar {len(batch)} sinal(is) ({tickers}): {e}")
+            print(f"\t❌ Erro ao gravar sinais em lote: {e}")
+            return {}
+
+        for result, on_saved in batch:
+            if not on_saved:
+                continue
+            try:
+                on_saved(*saved.get(result['ticker'], (None, False)))
+            except Exception as e:
+                self.errors.append(f"Falha pós-gravação de {result['ticker']}: {e}")
+                print(f"\t❌ Erro ao notificar {result['ticker']}: {e}")
+        return saved
+
+
+# Repositórios buffered vivos: um único hook de saída grava o que ficou pendente
+# (sem acumular um atexit por instância em processos longos, como o dashboard)
+_live_buffers = weakref.WeakSet()
+
+@atexit.register
+def _flush_live_buffers():
+    for repository in list(_live_buffers):
+        repository.flush()
@@ -0,0 +1,189 @@
+import contextvars
+import io
+import itertools
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from contextlib import contextmanager
+
+# Destino do print() no contexto atual (job em execução ou captura pontual); None = stdout real
+_log_sink = contextvars.ContextVar("scan_log_sink", default=None)
+
+
+class ScanJob:
+    """
+    Execução em segundo plano (ex: varredura completa disparada pelo dashboard).
+    Guarda status, progresso por ativo e o log (stdout) da execução.
+    """
+
+    MAX_LOG_CHUNKS = 20000
+
+    def __init__(self, job_id: int, key: str):
+        self.id = job_id
+        self.key = key
+        self.status = "queued"      # queued -> running -> done | failed
+        self.error = None
+        self.result = None
+        self.started_at = None
+        self.finished_at = None
+        self.done = 0
+        self.total = 0
+        self.current = None         # Último ativo concluído
+        self._log = deque(maxlen=self.MAX_LOG_CHUNKS)
+        self._lock = threading.Lock()
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in ("queued", "running")
+
+    def write(self, text: str):
+        with self._lock:
+            self._log.append(text)
+
+    def set_progress(self, ticker, done: int, total: int):
+        """Callback de progresso por ativo (compatível com MarketScanner.scan)."""
+        with self._lock:
+            self.current, self.done, self.total = ticker, int(done), int(total)
+
+    def log_text(self, tail: int = None) -> str:
+        """Log acumulado (ou só as últimas `tail` linhas)."""
+        with self._lock:
+            text = "".join(self._log)
+        if tail:
+            text = "\n".join(text.splitlines()[-tail:])
+        return text
+
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+
+class JobRegistry:
+    """
+    Registro (por processo) das execuções em segundo plano.
+    Só existe uma execução ativa por `key`: pedidos repetidos (ex: dois usuários
+    no dashboard) recebem o job que já está rodando.
+    """
+
+    def __init__(self, history: int = 20):
+        self._jobs = {}
+        self._history = history
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        _install_stdout_router()
+
+    def submit(self, key: str, fn):
+        """
+        Inicia fn(job) em uma thread, com o stdout roteado para o log do job.
+        Retorna (job, created); created=False quando já havia um job ativo com a mesma key.
+        """
+        with self._lock:
+            running = self._active_locked(key)
+            if running is not None:
+                return running, False
+
+            job = ScanJob(next(self._ids), key)
+            self._jobs[job.id] = job
+            # Mantém só o histórico recente
+            for old_id in sorted(self._jobs)[:-self._history]:
+                if not self._jobs[old_id].is_active:
+                    del self._jobs[old_id]
+
+        ctx = contextvars.copy_context()
+        thread = threading.Thread(target=ctx.run, args=(self._run, job, fn), name=f"job-{key}-{job.id}", daemon=True)
+        thread.start()
+        return job, True
+
+    def get(self, job_id: int):
+        return self._jobs.get(job_id)
+
+    def active(self, key: str):
+        """Job ativo (queued/running) da key, ou None."""
+        with self._lock:
+            return self._active_locked(key)
+
+    def latest(self, key: str):
+        with self._lock:
+            jobs = [job for job in self._jobs.values() if job.key == key]
+        return max(jobs, key=lambda job: job.id) if jobs else None
+
+    def _active_locked(self, key):
+        for job in self._jobs.values():
+            if job.key == key and job.is_active:
+                return job
+        return None
+
+    @staticmethod
+    def _run(job: ScanJob, fn):
+        _log_sink.set(job)
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            job.result = fn(job)
+            job.status = "done"
+        except Exception as e:
+            job.error = str(e)
+            job.write(traceback.format_exc())
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+
+
+@contextmanager
+def capture_stdout():
+    """
+    Captura o print() do contexto atual (e das threads do scanner) em um buffer,
+    sem trocar sys.stdout globalmente (seguro com jobs rodando em paralelo).
+    """
+    _install_stdout_router()
+    buffer = io.StringIO()
+    token = _log_sink.set(buffer)
+    try:
+        yield buffer
+    finally:
+        _log_sink.reset(token)
+
+
+class _StdoutRouter(io.TextIOBase):
+    """sys.stdout que escreve no destino do contexto atual (job/captura) ou no stdout real."""
+
+    def __init__(self, fallback):
+        self.fallback = fallback
+
+    def write(self, text):
+        sink = _log_sink.get()
+        if sink is None:
+            return self.fallback.write(text)
+        sink.write(text)
+        return len(text)
+
+    def flush(self):
+        self.fallback.flush()
+
+    @property
+    def encoding(self):
+        return getattr(self.fallback, "encoding", "utf-8")
+
+
+_router_lock = threading.Lock()
+
+def _install_stdout_router():
+    with _router_lock:
+        if not isinstance(sys.stdout, _StdoutRouter):
+            sys.stdout = _StdoutRouter(sys.stdout)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_job_registry() -> JobRegistry:
+    """Instância única (por processo) do registro de jobs, compartilhada entre sessões do dashboard."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = JobRegistry()
+    return _registry
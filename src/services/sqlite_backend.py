@@ -0,0 +1,493 @@
+import json
+import os
+import sqlite3
+import threading
+from datetime import date, datetime
+
+# Mesmo schema de supabase_schema.sql + update_schema_v2..v8.sql, em tipos do SQLite
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS assets (
+    ticker TEXT PRIMARY KEY,
+    name TEXT,
+    sector TEXT,
+    active INTEGER DEFAULT 1,
+    created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+);
+
+CREATE TABLE IF NOT EXISTS signals (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ticker TEXT REFERENCES assets(ticker),
+    signal_date TEXT NOT NULL,
+    direction TEXT CHECK (direction IN ('BUY', 'SELL')),
+    price_at_signal REAL,
+    hilo_value REAL,
+    processed INTEGER DEFAULT 0,
+    created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+);
+
+CREATE TABLE IF NOT EXISTS option_opportunities (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    signal_id INTEGER REFERENCES signals(id),
+    ticker_asset TEXT,
+    ticker_option TEXT,
+    option_type TEXT CHECK (option_type IN ('CALL', 'PUT')),
+    strike REAL,
+    expiration_date TEXT,
+    premium_at_signal REAL,
+    distance_to_strike REAL,
+    days_to_expire INTEGER,
+    created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+);
+
+CREATE INDEX IF NOT EXISTS idx_signals_date ON signals(signal_date);
+CREATE INDEX IF NOT EXISTS idx_signals_ticker ON signals(ticker);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_signals_ticker_date ON signals(ticker, signal_date);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_option_opportunities_signal ON option_opportunities(signal_id);
+
+CREATE TABLE IF NOT EXISTS app_config (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    updated_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+);
+
+CREATE TABLE IF NOT EXISTS portfolio (
+    id TEXT PRIMARY KEY DEFAULT (lower(hex(randomblob(16)))),
+    created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+    ticker_asset TEXT NOT NULL,
+    ticker_option TEXT NOT NULL,
+    type TEXT NOT NULL,
+    strike REAL,
+    expiration_date TEXT,
+    operation_type TEXT DEFAULT 'COMPRA SEC',
+    entry_date TEXT NOT NULL,
+    entry_price REAL NOT NULL,
+    quantity INTEGER NOT NULL,
+    exit_date TEXT,
+    exit_price REAL,
+    result_value REAL,
+    result_percent REAL,
+    status TEXT DEFAULT 'ABERTA',
+    notes TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_portfolio_status ON portfolio(status);
+CREATE INDEX IF NOT EXISTS idx_portfolio_ticker ON portfolio(ticker_asset);
+
+CREATE TABLE IF NOT EXISTS hilo_state (
+    ticker TEXT PRIMARY KEY,
+    period INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    updated_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+);
+
+CREATE TABLE IF NOT EXISTS flip_triggers (
+    ticker TEXT PRIMARY KEY,
+    period INTEGER NOT NULL,
+    trend INTEGER NOT NULL CHECK (trend IN (1, -1)),
+    trigger_price REAL NOT NULL,
+    direction TEXT NOT NULL CHECK (direction IN ('BUY', 'SELL')),
+    band_low REAL NOT NULL,
+    band_high REAL NOT NULL,
+    last_close REAL,
+    candle_date TEXT,
+    updated_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+);
+
+CREATE TABLE IF NOT EXISTS intraday_prices (
+    ticker TEXT PRIMARY KEY,
+    price REAL NOT NULL,
+    quote_date TEXT NOT NULL,
+    updated_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+);
+
+CREATE TABLE IF NOT EXISTS notification_outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    number TEXT NOT NULL,
+    text TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL,
+    claimed_at REAL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    sent_at REAL
+);
+
+CREATE INDEX IF NOT EXISTS idx_notification_outbox_due ON notification_outbox(status, next_attempt);
+
+CREATE INDEX IF NOT EXISTS idx_portfolio_created_at ON portfolio(created_at DESC);
+
+CREATE VIEW IF NOT EXISTS portfolio_totals_by_status AS
+SELECT status, COUNT(*) AS trades,
+       COALESCE(SUM(entry_price * quantity), 0) AS invested,
+       COALESCE(SUM(exit_price * quantity), 0) AS returned,
+       COALESCE(SUM(result_value), 0) AS result
+FROM portfolio GROUP BY status;
+
+CREATE VIEW IF NOT EXISTS portfolio_totals_by_asset AS
+SELECT ticker_asset, status, COUNT(*) AS trades,
+       COALESCE(SUM(entry_price * quantity), 0) AS invested,
+       COALESCE(SUM(exit_price * quantity), 0) AS returned,
+       COALESCE(SUM(result_value), 0) AS result
+FROM portfolio GROUP BY ticker_asset, status;
+
+CREATE VIEW IF NOT EXISTS portfolio_totals_by_month AS
+SELECT strftime('%Y-%m', entry_date) AS month, status, COUNT(*) AS trades,
+       COALESCE(SUM(entry_price * quantity), 0) AS invested,
+       COALESCE(SUM(exit_price * quantity), 0) AS returned,
+       COALESCE(SUM(result_value), 0) AS result
+FROM portfolio GROUP BY 1, status;
+
+INSERT OR IGNORE INTO assets (ticker, name, active) VALUES
+    ('PETR4', 'Petrobras PN', 1),
+    ('VALE3', 'Vale ON', 1),
+    ('BOVA11', 'ETF Ibovespa', 1);
+
+INSERT OR IGNORE INTO app_config (key, value) VALUES ('whatsapp_number', '5562981867784');
+"""
+
+# Colunas que o Postgres devolve como boolean / JSONB
+BOOL_COLUMNS = {"assets": {"active"}, "signals": {"processed"}}
+JSON_COLUMNS = {"hilo_state": {"state"}}
+
+# Chaves estrangeiras usadas nos embeds do select: (tabela filha, coluna) -> (tabela pai, coluna)
+FOREIGN_KEYS = {
+    ("signals", "ticker"): ("assets", "ticker"),
+    ("option_opportunities", "signal_id"): ("signals", "id"),
+}
+
+
+class SQLiteResponse:
+    """Mesmo formato da resposta do supabase-py (data / count)."""
+
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class SQLiteClient:
+    """
+    Backend local (SQLite) com a mesma interface do cliente Supabase usada no projeto:
+    client.table(nome).select/insert/update/upsert/delete + filtros (eq, neq, gt, gte,
+    lt, lte, in_, is_), order, limit, range e execute(); client.rpc(função, params).
+
+    Permite rodar scanner, dashboard e backtests sem rede (Config.STORAGE_BACKEND = "sqlite").
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+
+    def table(self, name: str):
+        return SQLiteQuery(self, name)
+
+    def rpc(self, name: str, params: dict = None):
+        """Funções SQL do schema (mesmos nomes e parâmetros das funções do Postgres)."""
+        if name not in RPC_FUNCTIONS:
+            raise ValueError(f"Função inexistente: {name}")
+        return SQLiteRpc(self, RPC_FUNCTIONS[name], params or {})
+
+    def primary_key(self, table: str) -> list:
+        with self._lock:
+            info = self._conn.execute(f'PRAGMA table_info("{table}")').fetchall()
+        return [row['name'] for row in sorted(info, key=lambda r: r['pk']) if row['pk']]
+
+    def run(self, statements: list):
+        """Executa [(sql, params)] em uma transação. Retorna as linhas de todos os comandos."""
+        rows = []
+        with self._lock, self._conn:
+            for sql, params in statements:
+                rows.extend(self._conn.execute(sql, params).fetchall())
+        return rows
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class SQLiteRpc:
+    def __init__(self, client: SQLiteClient, fn, params: dict):
+        self.client = client
+        self.fn = fn
+        self.params = params
+
+    def execute(self) -> SQLiteResponse:
+        return SQLiteResponse(self.fn(self.client, **self.params))
+
+
+def _portfolio_summary(client, p_assets=None, p_statuses=None, p_result=None):
+    """Equivalente a portfolio_summary() de update_schema_v5.sql."""
+    where, params = ["1 = 1"], []
+    if p_assets:
+        where.append(f"ticker_asset IN ({', '.join('?' * len(p_assets))})")
+        params.extend(p_assets)
+    if p_statuses:
+        where.append(f"status IN ({', '.join('?' * len(p_statuses))})")
+        params.extend(p_statuses)
+    if p_result == "profit":
+        where.append("result_percent > 0")
+    elif p_result == "loss":
+        where.append("result_percent < 0")
+
+    sql = (
+        "SELECT COUNT(*) AS trades,"
+        " COALESCE(SUM(entry_price * quantity), 0) AS invested,"
+        " COALESCE(SUM(CASE WHEN status = 'Encerrada' THEN exit_price * quantity END), 0) AS returned,"
+        " COALESCE(SUM(CASE WHEN status = 'Encerrada' THEN result_value END), 0) AS result"
+        f" FROM portfolio WHERE {' AND '.join(where)}"
+    )
+    return [dict(row) for row in client.run([(sql, params)])]
+
+
+def _portfolio_filter_options(client):
+    """Equivalente a portfolio_filter_options() de update_schema_v5.sql."""
+    assets = client.run([("SELECT DISTINCT ticker_asset FROM portfolio ORDER BY 1", [])])
+    statuses = client.run([("SELECT DISTINCT status FROM portfolio ORDER BY 1", [])])
+    return {
+        "assets": [row[0] for row in assets],
+        "statuses": [row[0] for row in statuses],
+    }
+
+
+RPC_FUNCTIONS = {
+    "portfolio_summary": _portfolio_summary,
+    "portfolio_filter_options": _portfolio_filter_options,
+}
+
+
+class SQLiteQuery:
+    """Query builder encadeável no estilo do postgrest-py (subconjunto usado pelo projeto)."""
+
+    def __init__(self, client: SQLiteClient, table: str):
+        self.client = client
+        self.table_name = table
+        self._op = "select"
+        self._columns = "*"
+        self._count = None
+        self._payload = None
+        self._on_conflict = None
+        self._ignore_duplicates = False
+        self._filters = []   # [(sql, params)]
+        self._order = []
+        self._limit = None
+        self._offset = None
+
+    # --- Operações ---
+
+    def select(self, columns: str = "*", count: str = None):
+        self._op, self._columns, self._count = "select", columns, count
+        return self
+
+    def insert(self, rows):
+        self._op, self._payload = "insert", rows
+        return self
+
+    def upsert(self, rows, on_conflict: str = None, ignore_duplicates: bool = False):
+        self._op, self._payload = "upsert", rows
+        self._on_conflict, self._ignore_duplicates = on_conflict, ignore_duplicates
+        return self
+
+    def update(self, values: dict):
+        self._op, self._payload = "update", values
+        return self
+
+    def delete(self):
+        self._op = "delete"
+        return self
+
+    # --- Filtros / Modificadores ---
+
+    def eq(self, column, value):
+        return self._where(f'"{column}" = ?', [value])
+
+    def neq(self, column, value):
+        return self._where(f'"{column}" != ?', [value])
+
+    def gt(self, column, value):
+        return self._where(f'"{column}" > ?', [value])
+
+    def gte(self, column, value):
+        return self._where(f'"{column}" >= ?', [value])
+
+    def lt(self, column, value):
+        return self._where(f'"{column}" < ?', [value])
+
+    def lte(self, column, value):
+        return self._where(f'"{column}" <= ?', [value])
+
+    def in_(self, column, values):
+        values = list(values)
+        if not values:
+            return self._where("0", [])
+        return self._where(f'"{column}" IN ({", ".join("?" * len(values))})', values)
+
+    def is_(self, column, value):
+        if value is None or str(value).lower() == "null":
+            return self._where(f'"{column}" IS NULL', [])
+        return self._where(f'"{column}" IS ?', [value])
+
+    def order(self, column, desc: bool = False):
+        self._order.append(f'"{column}" {"DESC" if desc else "ASC"}')
+        return self
+
+    def limit(self, size: int):
+        self._limit = int(size)
+        return self
+
+    def range(self, start: int, end: int):
+        self._offset, self._limit = int(start), int(end) - int(start) + 1
+        return self
+
+    def _where(self, sql, params):
+        self._filters.append((sql, [_to_sql(v) for v in params]))
+        return self
+
+    # --- Execução ---
+
+    def execute(self) -> SQLiteResponse:
+        return getattr(self, f"_execute_{self._op}")()
+
+    def _where_sql(self):
+        if not self._filters:
+            return "", []
+        params = [p for _, ps in self._filters for p in ps]
+        return " WHERE " + " AND ".join(sql for sql, _ in self._filters), params
+
+    def _execute_select(self):
+        fields, embeds = _parse_select(self._columns)
+        where, params = self._where_sql()
+        sql = f'SELECT * FROM "{self.table_name}"{where}'
+        if self._order:
+            sql += " ORDER BY " + ", ".join(self._order)
+        if self._limit is not None:
+            sql += f" LIMIT {self._limit}"
+            if self._offset:
+                sql += f" OFFSET {self._offset}"
+
+        rows = [self._decode(self.table_name, row) for row in self.client.run([(sql, params)])]
+        for embed in embeds:
+            self._embed(rows, embed)
+        if fields != ["*"]:
+            keep = set(fields) | set(embeds)
+            rows = [{k: v for k, v in row.items() if k in keep} for row in rows]
+
+        count = None
+        if self._count:
+            total = self.client.run([(f'SELECT COUNT(*) AS n FROM "{self.table_name}"{where}', params)])
+            count = total[0]['n']
+        return SQLiteResponse(rows, count)
+
+    def _execute_insert(self):
+        return self._write_rows(conflict=None)
+
+    def _execute_upsert(self):
+        target = self._on_conflict or ",".join(self.client.primary_key(self.table_name))
+        return self._write_rows(conflict=[c.strip() for c in target.split(",")])
+
+    def _write_rows(self, conflict):
+        rows = self._payload if isinstance(self._payload, list) else [self._payload]
+        statements = []
+        for row in rows:
+            cols = list(row.keys())
+            sql = (
+                f'INSERT INTO "{self.table_name}" ({", ".join(_quote(c) for c in cols)}) '
+                f'VALUES ({", ".join("?" * len(cols))})'
+            )
+            if conflict is not None:
+                updates = [c for c in cols if c not in conflict]
+                sql += f' ON CONFLICT ({", ".join(conflict)}) '
+                if self._ignore_duplicates or not updates:
+                    sql += "DO NOTHING"
+                else:
+                    sql += "DO UPDATE SET " + ", ".join(f'"{c}" = excluded."{c}"' for c in updates)
+            statements.append((sql + " RETURNING *", [_to_sql(row[c]) for c in cols]))
+
+        data = [self._decode(self.table_name, r) for r in self.client.run(statements)]
+        return SQLiteResponse(data)
+
+    def _execute_update(self):
+        cols = list(self._payload.keys())
+        where, params = self._where_sql()
+        sql = (
+            f'UPDATE "{self.table_name}" SET {", ".join(_quote(c) + " = ?" for c in cols)}'
+            f"{where} RETURNING *"
+        )
+        values = [_to_sql(self._payload[c]) for c in cols] + params
+        return SQLiteResponse([self._decode(self.table_name, r) for r in self.client.run([(sql, values)])])
+
+    def _execute_delete(self):
+        where, params = self._where_sql()
+        sql = f'DELETE FROM "{self.table_name}"{where} RETURNING *'
+        return SQLiteResponse([self._decode(self.table_name, r) for r in self.client.run([(sql, params)])])
+
+    def _embed(self, rows, other: str):
+        """Resolve 'tabela(*)' no select: filhos viram lista, pai vira dict (como no PostgREST)."""
+        if not rows:
+            return
+        for (child, fk), (parent, pk) in FOREIGN_KEYS.items():
+            if child == other and parent == self.table_name:
+                local, remote, many = pk, fk, True
+                break
+            if child == self.table_name and parent == other:
+                local, remote, many = fk, pk, False
+                break
+        else:
+            raise ValueError(f"Sem relacionamento entre {self.table_name} e {other}")
+
+        keys = list({row[local] for row in rows if row.get(local) is not None})
+        related = {}
+        if keys:
+            sql = f'SELECT * FROM "{other}" WHERE "{remote}" IN ({", ".join("?" * len(keys))})'
+            for r in self.client.run([(sql, keys)]):
+                related.setdefault(r[remote], []).append(self._decode(other, r))
+
+        for row in rows:
+            found = related.get(row.get(local), [])
+            row[other] = found if many else (found[0] if found else None)
+
+    @staticmethod
+    def _decode(table, row) -> dict:
+        data = dict(row)
+        for col in BOOL_COLUMNS.get(table, ()):
+            if data.get(col) is not None:
+                data[col] = bool(data[col])
+        for col in JSON_COLUMNS.get(table, ()):
+            if isinstance(data.get(col), str):
+                data[col] = json.loads(data[col])
+        return data
+
+
+def _parse_select(columns: str):
+    """'*, option_opportunities(*)' -> (['*'], ['option_opportunities'])"""
+    fields, embeds = [], []
+    for part in (p.strip() for p in columns.split(",")):
+        if not part:
+            continue
+        if part.endswith(")") and "(" in part:
+            embeds.append(part[:part.index("(")].strip())
+        else:
+            fields.append(part)
+    return fields or ["*"], embeds
+
+
+def _quote(name: str) -> str:
+    return f'"{name}"'
+
+
+def _to_sql(value):
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
@@ -1,7 +1,13 @@
+import threading
 from supabase import create_client, Client
 from src.config import Config
+from src.services.sqlite_backend import SQLiteClient
 
-def get_supabase_client() -> Client:
+_supabase_client = None
+_supabase_lock = threading.Lock()
+
+def create_supabase_client() -> Client:
+    """Cria uma conexão nova com o Supabase (prefira get_supabase_client)."""
     url = Config.SUPABASE_URL
     key = Config.SUPABASE_KEY
     
@@ -9,3 +15,31 @@ def get_supabase_client() -> Client:
         raise ValueError("Credenciais do Supabase não encontradas.")
 
     return create_client(url, key)
+
+def create_storage_client():
+    """
+    Cria o cliente do backend configurado em Config.STORAGE_BACKEND:
+    Supabase (padrão) ou SQLite local com a mesma interface de consulta.
+    """
+    if Config.STORAGE_BACKEND == "sqlite":
+        return SQLiteClient(Config.SQLITE_DB_PATH)
+    return create_supabase_client()
+
+def get_supabase_client() -> Client:
+    """
+    Instância única (por processo) do cliente de banco, criada na primeira chamada
+    e compartilhada por Repository, NotificationService, main e dashboard.
+    Com STORAGE_BACKEND=sqlite retorna o SQLiteClient (drop-in local).
+    """
+    global _supabase_client
+    if _supabase_client is None:
+        with _supabase_lock:
+            if _supabase_client is None:
+                _supabase_client = create_storage_client()
+    return _supabase_client
+
+def reset_supabase_client():
+    """Descarta a instância compartilhada (ex: após trocar as credenciais)."""
+    global _supabase_client
+    with _supabase_lock:
+        _supabase_client = None
@@ -38,6 +38,10 @@ CREATE TABLE IF NOT EXISTS option_opportunities (
 CREATE INDEX IF NOT EXISTS idx_signals_date ON signals(signal_date);
 CREATE INDEX IF NOT EXISTS idx_signals_ticker ON signals(ticker);
 
+-- Unicidade usada pelos upserts (um sinal por ativo/dia, uma oportunidade por sinal)
+CREATE UNIQUE INDEX IF NOT EXISTS uq_signals_ticker_date ON signals(ticker, signal_date);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_option_opportunities_signal ON option_opportunities(signal_id);
+
 -- Seed inicial de ativos (Opcional, mas útil)
 INSERT INTO assets (ticker, name, active) VALUES
 ('PETR4', 'Petrobras PN', TRUE),
@@ -0,0 +1,8 @@
+-- Estado incremental do HiLo por ativo (janela de máximas/mínimas, tendência e último HiLo)
+-- Permite que o scanner avance apenas com os candles novos em vez de recalcular 3 meses.
+CREATE TABLE IF NOT EXISTS hilo_state (
+    ticker VARCHAR(10) PRIMARY KEY,
+    period INTEGER NOT NULL,
+    state JSONB NOT NULL,             -- Serialização de HiLoState.to_dict()
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
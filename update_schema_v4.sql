@@ -0,0 +1,34 @@
+-- Sinais idempotentes: um sinal por ativo/dia e uma oportunidade por sinal.
+-- Permite gravar em lote com ON CONFLICT DO NOTHING (sem SELECT prévio e sem corrida entre execuções).
+
+-- 1. Remover duplicatas existentes (mantém o sinal mais antigo de cada ativo/dia)
+DELETE FROM option_opportunities
+WHERE signal_id IN (
+    SELECT id FROM (
+        SELECT id, ROW_NUMBER() OVER (PARTITION BY ticker, signal_date ORDER BY id) AS rn
+        FROM signals
+    ) dup
+    WHERE dup.rn > 1
+);
+
+DELETE FROM signals
+WHERE id IN (
+    SELECT id FROM (
+        SELECT id, ROW_NUMBER() OVER (PARTITION BY ticker, signal_date ORDER BY id) AS rn
+        FROM signals
+    ) dup
+    WHERE dup.rn > 1
+);
+
+DELETE FROM option_opportunities
+WHERE id IN (
+    SELECT id FROM (
+        SELECT id, ROW_NUMBER() OVER (PARTITION BY signal_id ORDER BY id) AS rn
+        FROM option_opportunities
+    ) dup
+    WHERE dup.rn > 1
+);
+
+-- 2. Índices únicos usados pelos upserts do Repository (ON CONFLICT)
+CREATE UNIQUE INDEX IF NOT EXISTS uq_signals_ticker_date ON signals(ticker, signal_date);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_option_opportunities_signal ON option_opportunities(signal_id);
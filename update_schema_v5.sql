@@ -0,0 +1,75 @@
+-- Agregados da carteira calculados no banco (o dashboard não baixa mais a tabela inteira).
+-- Payload proporcional ao número de grupos, não ao número de operações.
+
+-- 1. Totais por status
+CREATE OR REPLACE VIEW portfolio_totals_by_status AS
+SELECT
+    status,
+    COUNT(*) AS trades,
+    COALESCE(SUM(entry_price * quantity), 0) AS invested,
+    COALESCE(SUM(exit_price * quantity), 0) AS returned,
+    COALESCE(SUM(result_value), 0) AS result
+FROM portfolio
+GROUP BY status;
+
+-- 2. Totais por ativo base (e status)
+CREATE OR REPLACE VIEW portfolio_totals_by_asset AS
+SELECT
+    ticker_asset,
+    status,
+    COUNT(*) AS trades,
+    COALESCE(SUM(entry_price * quantity), 0) AS invested,
+    COALESCE(SUM(exit_price * quantity), 0) AS returned,
+    COALESCE(SUM(result_value), 0) AS result
+FROM portfolio
+GROUP BY ticker_asset, status;
+
+-- 3. Totais por mês de entrada (e status)
+CREATE OR REPLACE VIEW portfolio_totals_by_month AS
+SELECT
+    to_char(date_trunc('month', entry_date), 'YYYY-MM') AS month,
+    status,
+    COUNT(*) AS trades,
+    COALESCE(SUM(entry_price * quantity), 0) AS invested,
+    COALESCE(SUM(exit_price * quantity), 0) AS returned,
+    COALESCE(SUM(result_value), 0) AS result
+FROM portfolio
+GROUP BY 1, status;
+
+-- 4. Resumo da seleção filtrada da Custódia (mesma regra do rodapé do dashboard:
+--    investido em todas as operações; retornado e resultado só das encerradas)
+--    p_result: NULL (todos), 'profit' (result_percent > 0) ou 'loss' (result_percent < 0)
+CREATE OR REPLACE FUNCTION portfolio_summary(
+    p_assets TEXT[] DEFAULT NULL,
+    p_statuses TEXT[] DEFAULT NULL,
+    p_result TEXT DEFAULT NULL
+)
+RETURNS TABLE (trades BIGINT, invested NUMERIC, returned NUMERIC, result NUMERIC)
+LANGUAGE sql STABLE
+AS $$
+    SELECT
+        COUNT(*),
+        COALESCE(SUM(entry_price * quantity), 0),
+        COALESCE(SUM(exit_price * quantity) FILTER (WHERE status = 'Encerrada'), 0),
+        COALESCE(SUM(result_value) FILTER (WHERE status = 'Encerrada'), 0)
+    FROM portfolio
+    WHERE (p_assets IS NULL OR cardinality(p_assets) = 0 OR ticker_asset = ANY(p_assets))
+      AND (p_statuses IS NULL OR cardinality(p_statuses) = 0 OR status = ANY(p_statuses))
+      AND (p_result IS NULL
+           OR (p_result = 'profit' AND result_percent > 0)
+           OR (p_result = 'loss' AND result_percent < 0));
+$$;
+
+-- 5. Opções dos filtros (ativos e status distintos)
+CREATE OR REPLACE FUNCTION portfolio_filter_options()
+RETURNS JSON
+LANGUAGE sql STABLE
+AS $$
+    SELECT json_build_object(
+        'assets', COALESCE((SELECT json_agg(DISTINCT ticker_asset ORDER BY ticker_asset) FROM portfolio), '[]'::json),
+        'statuses', COALESCE((SELECT json_agg(DISTINCT status ORDER BY status) FROM portfolio), '[]'::json)
+    );
+$$;
+
+-- Índice para a listagem paginada (ORDER BY created_at DESC)
+CREATE INDEX IF NOT EXISTS idx_portfolio_created_at ON portfolio(created_at DESC);
@@ -0,0 +1,17 @@
+-- Gatilhos de virada do HiLo, pré-calculados no fechamento (um por ativo).
+-- O verificador intraday só precisa de uma cotação em lote para saber quem virou:
+--   direction = 'BUY'  (tendência de baixa): vira se preço > trigger_price
+--   direction = 'SELL' (tendência de alta):  vira se preço <= trigger_price
+-- band_low/band_high: faixa de alerta de proximidade (0,5% do HiLo).
+CREATE TABLE IF NOT EXISTS flip_triggers (
+    ticker VARCHAR(10) PRIMARY KEY,
+    period INTEGER NOT NULL,
+    trend SMALLINT NOT NULL CHECK (trend IN (1, -1)),
+    trigger_price NUMERIC NOT NULL,
+    direction VARCHAR(4) NOT NULL CHECK (direction IN ('BUY', 'SELL')),
+    band_low NUMERIC NOT NULL,
+    band_high NUMERIC NOT NULL,
+    last_close NUMERIC,
+    candle_date DATE,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
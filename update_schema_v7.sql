@@ -0,0 +1,9 @@
+-- Último preço avaliado pelo verificador intraday (ativos e opções em carteira), por dia.
+-- Cada execução (a cada 15 min, processo novo) parte do preço da execução anterior
+-- do mesmo pregão: só dispara alertas cruzados desde então (sem repetir virada/meta).
+CREATE TABLE IF NOT EXISTS intraday_prices (
+    ticker VARCHAR(20) PRIMARY KEY,
+    price NUMERIC NOT NULL,
+    quote_date DATE NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
@@ -0,0 +1,19 @@
+-- Fila durável de notificações de WhatsApp (outbox), compartilhada entre execuções.
+-- O que não for entregue até o fim de uma execução (GitHub Actions) é entregue pela próxima.
+-- Urgentes (priority > 0) saem primeiro. Cada mensagem é reservada com UPDATE ... WHERE status = 'pending' (sem envio duplicado).
+-- Horários em unix epoch (segundos): next_attempt, claimed_at, created_at, sent_at.
+CREATE TABLE IF NOT EXISTS notification_outbox (
+    id BIGSERIAL PRIMARY KEY,
+    number VARCHAR(20) NOT NULL,
+    text TEXT NOT NULL,
+    priority SMALLINT NOT NULL DEFAULT 0,   -- maior sai antes (1 = alerta de saída urgente)
+    status VARCHAR(10) NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'sending', 'sent', 'failed')),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt DOUBLE PRECISION NOT NULL,
+    claimed_at DOUBLE PRECISION,
+    last_error TEXT,
+    created_at DOUBLE PRECISION NOT NULL,
+    sent_at DOUBLE PRECISION
+);
+
+CREATE INDEX IF NOT EXISTS idx_notification_outbox_due ON notification_outbox(status, next_attempt);